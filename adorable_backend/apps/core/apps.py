@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    verbose_name = 'Core'
+
+    def ready(self):
+        from .metrics import instrument_connections, instrument_serializers
+        instrument_connections()
+        instrument_serializers()
@@ -0,0 +1,230 @@
+import json
+import math
+import re
+import time
+import urllib.error
+import urllib.request
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# Relative weights of each operation per traffic profile
+PROFILES = {
+    'mixed': {
+        'login': 2, 'profile': 20, 'locations': 15, 'location_search': 10,
+        'follows': 15, 'follow': 5, 'files': 15, 'download': 10, 'share': 5,
+    },
+    'browse': {
+        'profile': 25, 'locations': 25, 'location_search': 15, 'files': 25, 'download': 10,
+    },
+    'social': {
+        'profile': 20, 'follows': 40, 'follow': 30, 'location_search': 10,
+    },
+    'auth': {
+        'login': 70, 'profile': 30,
+    },
+}
+
+
+class Result:
+    def __init__(self, status, data, queries, seconds):
+        self.status = status
+        self.data = data
+        # None when the server does not report its query count
+        self.queries = queries
+        self.seconds = seconds
+
+
+class InProcessTransport:
+    """Drives the API through Django's test client; queries are captured directly."""
+
+    def request(self, method, path, token=None, data=None):
+        client = Client()
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {token}"} if token else {}
+        body = json.dumps(data) if data is not None else None
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if body is None:
+                response = getattr(client, method)(path, **headers)
+            else:
+                response = getattr(client, method)(path, body, content_type='application/json', **headers)
+            seconds = time.perf_counter() - started
+        return Result(response.status_code, parse_body(response.content), len(queries), seconds)
+
+
+class HttpTransport:
+    """Drives a running server over HTTP; queries come from its Server-Timing header."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, token=None, data=None):
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(
+            f"{self.base_url}{path}", data=body, headers=headers, method=method.upper()
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, content, timing = response.status, response.read(), response.headers.get('Server-Timing')
+        except urllib.error.HTTPError as error:
+            status, content, timing = error.code, error.read(), error.headers.get('Server-Timing')
+        seconds = time.perf_counter() - started
+        match = SERVER_TIMING_QUERIES.search(timing or '')
+        return Result(status, parse_body(content), int(match.group(1)) if match else None, seconds)
+
+
+def parse_body(content):
+    try:
+        return json.loads(content) if content else None
+    except ValueError:
+        return None
+
+
+def results_of(data):
+    return data.get('results', []) if isinstance(data, dict) else data or []
+
+
+class Session:
+    """One synthetic account issuing a weighted mix of API operations."""
+
+    def __init__(self, transport, user_id, user_ids, password, rng):
+        self.transport = transport
+        self.user_id = user_id
+        self.user_ids = user_ids
+        self.password = password
+        self.rng = rng
+        self.token = None
+        self.following = set()
+        self.created_follow = None
+        self.file_ids = []
+
+    @property
+    def email(self):
+        return f"synthetic{self.user_id}@example.com"
+
+    def start(self):
+        """Log in and load the ids later operations need; not measured."""
+        result = self.login()
+        if result.status != 200:
+            raise RuntimeError(f"Login for {self.email} failed with {result.status}")
+        following = self.call('get', '/api/social/follows/following/')
+        self.following = {row['followed'] for row in results_of(following.data)}
+        files = self.call('get', '/api/storage/files/')
+        self.file_ids = [row['id'] for row in results_of(files.data)]
+
+    def call(self, method, path, data=None):
+        return self.transport.request(method, path, token=self.token, data=data)
+
+    def login(self):
+        result = self.transport.request(
+            'post', '/api/users/auth/login/', data={'email': self.email, 'password': self.password}
+        )
+        if result.status == 200:
+            self.token = result.data['access']
+        return result
+
+    def profile(self):
+        return self.call('get', '/api/users/auth/profile/')
+
+    def locations(self):
+        return self.call('get', '/api/locations/')
+
+    def location_search(self):
+        return self.call('get', '/api/locations/?search=Place')
+
+    def follows(self):
+        return self.call('get', '/api/social/follows/')
+
+    def follow(self):
+        """Alternate between following someone new and undoing it."""
+        if self.created_follow is not None:
+            follow_id, self.created_follow = self.created_follow, None
+            return self.call('delete', f"/api/social/follows/{follow_id}/")
+        target = self.rng.choice(self.user_ids)
+        if target == self.user_id or target in self.following:
+            return self.follows()
+        result = self.call('post', '/api/social/follows/', {'followed': target})
+        if result.status == 201:
+            self.created_follow = result.data['id']
+        return result
+
+    def files(self):
+        return self.call('get', '/api/storage/files/')
+
+    def download(self):
+        if not self.file_ids:
+            return self.files()
+        return self.call('post', f"/api/storage/files/{self.rng.choice(self.file_ids)}/download/")
+
+    def share(self):
+        if not self.file_ids:
+            return self.files()
+        return self.call('post', '/api/storage/shared/bulk/', {
+            'files': [self.rng.choice(self.file_ids)],
+            'shared_with': [self.rng.choice(self.user_ids)],
+            'permission': 'view',
+        })
+
+    def run(self, operation):
+        return getattr(self, operation)()
+
+
+class EndpointStats:
+    def __init__(self):
+        self.seconds = []
+        self.queries = []
+        self.errors = 0
+
+    def add(self, result):
+        self.seconds.append(result.seconds)
+        if result.queries is not None:
+            self.queries.append(result.queries)
+        if result.status >= 400:
+            self.errors += 1
+
+    def summary(self, elapsed):
+        ordered = sorted(self.seconds)
+        return {
+            'requests': len(ordered),
+            'errors': self.errors,
+            'throughput': len(ordered) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(ordered, 50) * 1000,
+            'p95_ms': percentile(ordered, 95) * 1000,
+            'p99_ms': percentile(ordered, 99) * 1000,
+            'queries': sum(self.queries) / len(self.queries) if self.queries else None,
+        }
+
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def pick_operations(profile, count, rng):
+    weights = PROFILES[profile]
+    return rng.choices(list(weights), weights=list(weights.values()), k=count)
+
+
+def compare(summary, baseline, tolerance):
+    """Return regressions of ``summary`` against a stored baseline entry."""
+    problems = []
+    if summary['p95_ms'] > baseline['p95_ms'] * (1 + tolerance):
+        problems.append(f"p95 {summary['p95_ms']:.1f}ms > {baseline['p95_ms']:.1f}ms")
+    if summary['queries'] is not None and baseline.get('queries') is not None:
+        # Query counts are deterministic, so any increase is a regression
+        if summary['queries'] > baseline['queries'] + 0.5:
+            problems.append(f"queries {summary['queries']:.1f} > {baseline['queries']:.1f}")
+    return problems
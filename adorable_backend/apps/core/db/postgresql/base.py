@@ -0,0 +1,87 @@
+"""PostgreSQL backend that borrows connections from a psycopg 3 pool.
+
+Django 4.2 opens a new connection per request (or keeps one per thread with
+CONN_MAX_AGE). With ``OPTIONS['pool']`` set, connections are instead taken
+from a process-wide ``psycopg_pool.ConnectionPool`` when a request needs one
+and handed back when Django would close it, so bursts reuse warm
+connections instead of paying for TCP, TLS and authentication.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # One pool per alias, shared by every thread in the process
+    _connection_pools = {}
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict['OPTIONS'].get('pool')
+        # Test database creation connects to the 'postgres' database instead
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+
+        if self.alias not in self._connection_pools:
+            if not is_psycopg3:
+                raise ImproperlyConfigured('Connection pooling requires psycopg 3.')
+            if self.settings_dict['CONN_MAX_AGE'] != 0:
+                raise ImproperlyConfigured('Pooled connections cannot use CONN_MAX_AGE.')
+            try:
+                from psycopg_pool import ConnectionPool
+            except ImportError as exc:
+                raise ImproperlyConfigured('Connection pooling requires psycopg-pool.') from exc
+
+            connect_kwargs = self.get_connection_params()
+            # Django sets autocommit itself once a connection is checked out
+            connect_kwargs['autocommit'] = True
+            pool = ConnectionPool(
+                kwargs=connect_kwargs,
+                open=False,
+                check=(
+                    ConnectionPool.check_connection
+                    if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+                ),
+                name=f"django-{self.alias}",
+                **({} if pool_options is True else pool_options),
+            )
+            # Threads racing here build throwaway unopened pools; the first wins
+            self._connection_pools.setdefault(self.alias, pool)
+        return self._connection_pools[self.alias]
+
+    def close_pool(self):
+        pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        # Opening is a no-op once the pool is running; the first request
+        # starts the background workers that keep min_size connections warm
+        pool.open()
+        connection = pool.getconn()
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (
+            base.IsolationLevel(isolation_level) if isolation_level is not None
+            else base.IsolationLevel.READ_COMMITTED
+        )
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # The pool rolls back anything left open before reusing it
+            self.connection._pool.putconn(self.connection)
+        self.connection = None
@@ -0,0 +1,133 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_names(value):
+    """Split a comma-separated ``fields``/``expand`` parameter; None when absent."""
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def names_at(names, path):
+    """Names requested for the serializer at dotted ``path`` ('' is the top level).
+
+    ``file_details.title`` selects ``file_details`` at the top level and
+    ``title`` inside it.
+    """
+    if names is None:
+        return None
+    prefix = f"{path}." if path else ''
+    return {
+        name[len(prefix):].split('.')[0]
+        for name in names
+        if name.startswith(prefix) and len(name) > len(prefix)
+    }
+
+
+class SparseFieldsetMixin:
+    """``?fields=`` and ``?expand=`` support for model serializers.
+
+    Fields in ``Meta.expandable_fields`` are left out unless named in
+    ``expand`` or ``fields``; ``fields`` keeps only the named ones (plus
+    ``id``). Pruning happens in ``get_fields`` so dropped method fields and
+    nested serializers are never computed. ``Meta.field_sources`` names the
+    model fields a computed field reads, for ``SparseFieldsetViewMixin``.
+    """
+
+    @property
+    def sparse_path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            # List children are bound with an empty field name
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None:
+            return fields
+
+        path = self.sparse_path
+        requested = names_at(parse_names(request.GET.get('fields')), path)
+        expanded = names_at(parse_names(request.GET.get('expand')), path) or set()
+        # Writes validate every field; only the output is pruned on reads
+        if request.method not in SAFE_METHODS or not requested:
+            requested = None
+
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        for name in list(fields):
+            if requested is not None:
+                keep = name == 'id' or name in requested
+            else:
+                keep = name not in expandable or name in expanded
+            if not keep:
+                del fields[name]
+        return fields
+
+
+def queryset_plan(serializer, prefix=''):
+    """Return ``(columns, relations)`` a serializer reads, or None if unknown."""
+    model = serializer.Meta.model
+    sources = getattr(serializer.Meta, 'field_sources', {})
+    columns = {f"{prefix}{model._meta.pk.name}"}
+    relations = set()
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in sources:
+            attrs = list(sources[name])
+        elif field.source == '*':
+            return None
+        else:
+            attrs = [field.source_attrs[0]]
+
+        for attr in attrs:
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # A property or method could read any column
+                return None
+            if model_field.many_to_many or model_field.one_to_many:
+                return None
+            if not model_field.concrete:
+                continue
+            if model_field.is_relation and isinstance(field, serializers.BaseSerializer):
+                nested = queryset_plan(field, f"{prefix}{attr}__")
+                if nested is None:
+                    return None
+                relations.add(f"{prefix}{attr}")
+                relations.update(nested[1])
+                columns.update(nested[0])
+            columns.add(f"{prefix}{attr}")
+    return columns, relations
+
+
+class SparseFieldsetViewMixin:
+    """Load only the columns and relations the selected fields serialize.
+
+    Applied in ``filter_queryset`` so list and detail reads are narrowed;
+    custom actions that build their own queryset call ``select_fields``.
+    """
+
+    def filter_queryset(self, queryset):
+        return self.select_fields(super().filter_queryset(queryset))
+
+    def select_fields(self, queryset):
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        plan = queryset_plan(self.get_serializer())
+        if plan is None:
+            return queryset
+        columns, relations = plan
+        queryset = queryset.select_related(None)
+        # A bare select_related() would follow every foreign key
+        if relations:
+            queryset = queryset.select_related(*sorted(relations))
+        return queryset.only(*sorted(columns))
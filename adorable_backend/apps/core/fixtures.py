@@ -0,0 +1,80 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from apps.locations.models import Location
+from apps.social.models import Block, Follow, Report
+from apps.storage.models import File, SharedFile
+
+User = get_user_model()
+
+PNG_1PX = (
+    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00'
+    b'\x1f\x15\xc4\x89\x00\x00\x00\rIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N\x00'
+    b'\x00\x00\x00IEND\xaeB`\x82'
+)
+
+
+def create_file(user, index):
+    file = File(
+        user=user,
+        file_type='image',
+        original_name=f"seed-{index}.png",
+        size=len(PNG_1PX),
+        mime_type='image/png',
+        title=f"Seed file {index}",
+    )
+    file.file.save(f"seed-{index}.png", ContentFile(PNG_1PX), save=False)
+    file.save()
+    return file
+
+
+def seed_fixtures(size):
+    """Create a viewer with ``size`` rows of every relation the API lists.
+
+    Returns ``(viewer, others)``. Usernames start with ``seed`` so search
+    and batch endpoints match all of them.
+    """
+    viewer = User.objects.create_user(
+        username='seed-viewer', email='seed-viewer@example.com', password='seed-password'
+    )
+    others = [
+        User.objects.create_user(
+            username=f"seed-{index}",
+            email=f"seed-{index}@example.com",
+            password='seed-password',
+            first_name='Seed',
+            followers_count=index,
+        )
+        for index in range(size)
+    ]
+    blocked = [
+        User.objects.create_user(username=f"blocked-{index}", email=f"blocked-{index}@example.com")
+        for index in range(size)
+    ]
+
+    for index, other in enumerate(others):
+        Location.objects.create(
+            user=viewer,
+            name=f"Place {index}",
+            address=f"{index} Seed Street",
+            city='Seedville',
+            country='Seedland',
+            postal_code='00000',
+            latitude=Decimal('52.370216'),
+            longitude=Decimal('4.895168'),
+            type='home' if index == 0 else 'favorite',
+            is_primary=index == 0,
+        )
+        Follow.objects.create(follower=viewer, followed=other)
+        Follow.objects.create(follower=other, followed=viewer)
+        Report.objects.create(reporter=viewer, reported=other, type='spam', description='Seeded')
+
+        own = create_file(viewer, f"own-{index}")
+        SharedFile.objects.create(file=own, shared_by=viewer, shared_with=other)
+        received = create_file(other, f"received-{index}")
+        SharedFile.objects.create(file=received, shared_by=other, shared_with=viewer)
+
+    for user in blocked:
+        Block.objects.create(blocker=viewer, blocked=user)
+
+    return viewer, others
@@ -0,0 +1,105 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.response import Response
+from .routers import primary_reads
+
+
+def version_key(resource, user_id):
+    return f"listcache:version:{resource}:{user_id}"
+
+
+def get_list_version(resource, user_id):
+    key = version_key(resource, user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version evicted from Redis never comes
+        # back lower than before and revives entries cached under it
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_list_versions(resource, user_ids):
+    """Orphan every cached ``resource`` list of these users once the transaction commits.
+
+    One ``INCR`` per user; old entries are never looked up again and
+    simply expire.
+    """
+    user_ids = set(user_ids)
+
+    def bump():
+        for user_id in user_ids:
+            try:
+                cache.incr(version_key(resource, user_id))
+            except ValueError:
+                # No version yet: the next read seeds a fresh, higher one
+                pass
+
+    # Bumping before commit would let a reader cache the old rows under the new version
+    transaction.on_commit(bump)
+
+
+def list_cache_key(resource, request, version):
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    route = f"{request.resolver_match.view_name}?{params}"
+    digest = hashlib.sha1(route.encode()).hexdigest()
+    return f"listcache:{resource}:{request.user.pk}:{version}:{digest}"
+
+
+class CachedListMixin:
+    """Serve a viewset's per-user lists from the cache.
+
+    Entries are keyed by user, route, normalized query parameters and the
+    user's version of ``list_cache_resource``; signal handlers bump that
+    version whenever a row the list could show changes. Rows that drop out
+    with the passage of time change nothing, so ``list_cache_expires_at``
+    caps how long an entry lives. Misses are built from the primary: a
+    lagging replica would store old rows under a freshly bumped version.
+    """
+    list_cache_resource = None
+
+    def list_cache_expires_at(self):
+        """When the user's list next changes without a write, or None."""
+        return None
+
+    def list_cache_ttl(self):
+        ttl = settings.LIST_CACHE_TTL
+        expires_at = self.list_cache_expires_at()
+        if expires_at is not None:
+            ttl = min(ttl, int((expires_at - timezone.now()).total_seconds()))
+        return ttl
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_list_response(
+            request,
+            lambda: super(CachedListMixin, self).list(request, *args, **kwargs)
+        )
+
+    def cached_list_response(self, request, build):
+        if not settings.LIST_CACHE_TTL or not request.user.is_authenticated:
+            return build()
+
+        key = list_cache_key(
+            self.list_cache_resource,
+            request,
+            get_list_version(self.list_cache_resource, request.user.pk)
+        )
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        with primary_reads():
+            response = build()
+            # Under a second left: the list is about to change, serve it uncached
+            ttl = self.list_cache_ttl() if response.status_code == 200 else 0
+        if ttl > 0:
+            cache.set(key, response.data, ttl)
+        return response
@@ -0,0 +1,160 @@
+import io
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.benchmark import (
+    PROFILES,
+    EndpointStats,
+    HttpTransport,
+    InProcessTransport,
+    Session,
+    compare,
+    pick_operations,
+)
+from apps.core.testing import isolated_environment
+
+User = get_user_model()
+
+
+def parse_id_range(value):
+    start, _, stop = value.partition('-')
+    try:
+        return range(int(start), int(stop or start) + 1)
+    except ValueError:
+        raise CommandError(f"Invalid id range '{value}', expected START-END") from None
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the API with a weighted traffic profile and report throughput, '
+        'p50/p95/p99 latency and queries per request for each operation, '
+        'compared against stored baselines. Runs in-process over a generated '
+        'dataset by default, or against a running server with --url (start it '
+        'with SERVER_TIMING=True and RATE_LIMIT_BACKEND=apps.core.throttling.NullRateLimiter '
+        'and seed it with generate_data first).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='mixed')
+        parser.add_argument('--requests', type=int, default=500, help='Measured requests in total.')
+        parser.add_argument('--sessions', type=int, default=4, help='Concurrent logged-in accounts.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--user-ids', help='Id range of generated users on the server, e.g. 1-100000.')
+        parser.add_argument('--users', type=int, default=200, help='Users to generate for in-process runs.')
+        parser.add_argument('--password', default='synthetic-password')
+        parser.add_argument(
+            '--baseline',
+            default=str(Path(settings.BASE_DIR) / 'benchmark_baselines.json'),
+            help='JSON file with per-profile p95 and query baselines.',
+        )
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 regression, as a fraction.')
+        parser.add_argument('--update', action='store_true', help='Record this run as the baseline.')
+        parser.add_argument(
+            '--allow-missing-baseline',
+            action='store_true',
+            help='Report operations without a stored baseline instead of failing on them.',
+        )
+
+    def handle(self, *args, **options):
+        if options['url']:
+            if not options['user_ids']:
+                raise CommandError('--user-ids is required with --url.')
+            transport = HttpTransport(options['url'])
+            summaries, elapsed = self.run(transport, parse_id_range(options['user_ids']), options, workers=options['sessions'])
+        else:
+            # NullRateLimiter keeps the login throttle from capping the run
+            with isolated_environment(rate_limiter='apps.core.throttling.NullRateLimiter'):
+                call_command('generate_data', users=options['users'], seed=options['seed'], stdout=io.StringIO())
+                user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+                # The test client is single threaded, so sessions take turns
+                summaries, elapsed = self.run(InProcessTransport(), user_ids, options, workers=1)
+
+        self.report(summaries, elapsed, options)
+
+    def run(self, transport, user_ids, options, workers):
+        rng = random.Random(options['seed'])
+        user_ids = list(user_ids)
+        if len(user_ids) < options['sessions']:
+            raise CommandError('Not enough users for the requested sessions.')
+        sessions = [
+            Session(transport, user_id, user_ids, options['password'], random.Random(f"{options['seed']}:{user_id}"))
+            for user_id in rng.sample(user_ids, options['sessions'])
+        ]
+        for session in sessions:
+            session.start()
+
+        operations = pick_operations(options['profile'], options['requests'], rng)
+        stats = {operation: EndpointStats() for operation in PROFILES[options['profile']]}
+
+        def drive(index):
+            session = sessions[index]
+            results = []
+            for operation in operations[index::len(sessions)]:
+                results.append((operation, session.run(operation)))
+            return results
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for results in executor.map(drive, range(len(sessions))):
+                for operation, result in results:
+                    stats[operation].add(result)
+        elapsed = time.perf_counter() - started
+
+        summaries = {
+            operation: stats[operation].summary(elapsed)
+            for operation in sorted(stats) if stats[operation].seconds
+        }
+        return summaries, elapsed
+
+    def report(self, summaries, elapsed, options):
+        baseline_path = Path(options['baseline'])
+        baselines = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        profile_baseline = baselines.get(options['profile'], {})
+
+        self.stdout.write(
+            f"{'operation':16} {'reqs':>6} {'errors':>6} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}  status"
+        )
+        failures = []
+        for operation, summary in summaries.items():
+            problems = []
+            if summary['errors']:
+                problems.append(f"{summary['errors']} errors")
+            baseline = profile_baseline.get(operation)
+            if not options['update']:
+                if baseline is None:
+                    problems.append('no baseline')
+                else:
+                    problems.extend(compare(summary, baseline, options['tolerance']))
+            queries = '-' if summary['queries'] is None else f"{summary['queries']:.1f}"
+            status = '; '.join(problems) or 'ok'
+            self.stdout.write(
+                f"{operation:16} {summary['requests']:>6} {summary['errors']:>6} {summary['throughput']:>8.1f} "
+                f"{summary['p50_ms']:>8.1f} {summary['p95_ms']:>8.1f} {summary['p99_ms']:>8.1f} {queries:>8}  {status}"
+            )
+            if problems and not (options['allow_missing_baseline'] and problems == ['no baseline']):
+                failures.append(f"{operation}: {status}")
+
+        total = sum(summary['requests'] for summary in summaries.values())
+        self.stdout.write(f"{total} requests in {elapsed:.2f}s, {total / elapsed:.1f} req/s")
+
+        if options['update']:
+            baselines[options['profile']] = {
+                operation: {
+                    'p95_ms': round(summary['p95_ms'], 1),
+                    'queries': None if summary['queries'] is None else round(summary['queries'], 2),
+                }
+                for operation, summary in summaries.items()
+            }
+            baseline_path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f"Wrote {options['profile']} baseline to {baseline_path}")
+
+        if failures:
+            raise CommandError('Benchmark regressed:\n' + '\n'.join(failures))
@@ -0,0 +1,281 @@
+import hashlib
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+from apps.core.fixtures import PNG_1PX, seed_fixtures
+from apps.core.testing import isolated_environment
+from apps.storage.models import File
+from apps.storage.uploads import PURPOSE_FILE, build_upload_key, get_direct_upload_backend, sign_upload
+from apps.users.authentication import local_user_cache
+from apps.users.models import User
+from apps.users.tokens import BlacklistRefreshToken
+
+SKIPPED_NAMESPACES = {'admin'}
+MEASURED_METHODS = ('get', 'post')
+
+# Routes that need query parameters to do real work
+ROUTE_PARAMS = {
+    'users:user_batch': lambda viewer, others: {'ids': ','.join(str(user.pk) for user in others)},
+    'users:user_search': lambda viewer, others: {'q': 'seed'},
+}
+
+# Extra parameter sets measured as their own ``route?variant`` budget entries,
+# for responses that load more relations than the default one
+ROUTE_VARIANTS = {
+    'shared-file-list': {'expand=file_details': {'expand': 'file_details'}},
+    'shared-file-detail': {'expand=file_details': {'expand': 'file_details'}},
+}
+
+
+def new_user(name):
+    return User.objects.create_user(username=f"budget-{name}", email=f"budget-{name}@example.com")
+
+
+def own_file_ids(viewer):
+    return list(File.objects.filter(user=viewer).values_list('pk', flat=True))
+
+
+def completed_upload(viewer, others):
+    key = build_upload_key(viewer, PURPOSE_FILE, 'budget.png')
+    get_direct_upload_backend().put(key, PNG_1PX)
+    return {'upload': sign_upload({
+        'purpose': PURPOSE_FILE, 'original_name': 'budget.png', 'content_type': 'image/png',
+        'size': len(PNG_1PX), 'md5': hashlib.md5(PNG_1PX).hexdigest(), 'file_type': 'image',
+        'title': '', 'description': '', 'tags': [], 'is_public': False,
+        'user': viewer.pk, 'key': key,
+    })}
+
+
+def report_triage(viewer, others):
+    # Only staff may triage reports
+    User.objects.filter(pk=viewer.pk).update(is_staff=True)
+    viewer.is_staff = True
+    return {'status': 'resolved'}
+
+
+# Bodies POST routes are measured with; every POST route needs one.
+# Multipart bodies are sent as forms, everything else as JSON.
+ROUTE_PAYLOADS = {
+    'users:login': lambda viewer, others: {'email': viewer.email, 'password': 'seed-password'},
+    'users:register': lambda viewer, others: {
+        'email': 'budget-register@example.com', 'password': 'budget-Passw0rd',
+        'confirm_password': 'budget-Passw0rd',
+    },
+    'users:logout': lambda viewer, others: {'refresh': str(BlacklistRefreshToken.for_user(viewer))},
+    'users:token_refresh': lambda viewer, others: {'refresh': str(BlacklistRefreshToken.for_user(viewer))},
+    'users:reset_password': lambda viewer, others: {'email': viewer.email},
+    'location-list': lambda viewer, others: {
+        'name': 'Budget', 'address': '1 Budget Road', 'latitude': '1.5', 'longitude': '2.5', 'type': 'work',
+    },
+    'follow-list': lambda viewer, others: {'followed': new_user('followed').pk},
+    'block-list': lambda viewer, others: {'blocked': new_user('blocked').pk},
+    'report-list': lambda viewer, others: {'reported': others[0].pk, 'type': 'spam', 'description': 'Budget'},
+    'report-change-status': report_triage,
+    'file-list': lambda viewer, others: {
+        'file': SimpleUploadedFile('budget.png', PNG_1PX, content_type='image/png'),
+        'file_type': 'image', 'original_name': 'budget.png', 'title': 'Budget',
+    },
+    'file-archive': lambda viewer, others: {'files': own_file_ids(viewer)},
+    'file-download': lambda viewer, others: {},
+    'shared-file-list': lambda viewer, others: {
+        'file': own_file_ids(viewer)[0], 'shared_with': new_user('recipient').pk,
+    },
+    'shared-file-bulk': lambda viewer, others: {
+        'files': own_file_ids(viewer), 'shared_with': [new_user('bulk').pk, *(user.pk for user in others)],
+    },
+    'upload-list': lambda viewer, others: {
+        'original_name': 'budget.png', 'content_type': 'image/png', 'size': len(PNG_1PX),
+        'md5': hashlib.md5(PNG_1PX).hexdigest(),
+    },
+    'upload-complete': completed_upload,
+}
+MULTIPART_ROUTES = {'file-list'}
+
+# Routes that cannot succeed against any data, with the reason
+UNMEASURABLE_ROUTES = {
+    'users:verify_email': 'User has no email_verification_token field to verify against',
+}
+
+
+def iter_routes(patterns, namespace=None):
+    """Yield ``(name, pattern)`` for every named URL pattern, depth first."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            child = pattern.namespace
+            if namespace and child:
+                child = f"{namespace}:{child}"
+            yield from iter_routes(pattern.url_patterns, child or namespace)
+        elif pattern.name:
+            yield (f"{namespace}:{pattern.name}" if namespace else pattern.name), pattern
+
+
+def supports(pattern, method):
+    callback = pattern.callback
+    # Router-generated viewset routes carry their method -> action map
+    actions = getattr(callback, 'actions', None)
+    if actions is not None:
+        return method in actions
+    view_class = getattr(callback, 'view_class', None)
+    return view_class is not None and method in view_class.http_method_names and hasattr(view_class, method)
+
+
+def get_routes():
+    """Map ``(method, name)`` to URL kwargs for every GET and POST route."""
+    routes = {}
+    for name, pattern in iter_routes(get_resolver().url_patterns):
+        kwargs = set(pattern.pattern.regex.groupindex)
+        # DefaultRouter's format-suffix duplicates add nothing
+        if 'format' in kwargs:
+            continue
+        for method in MEASURED_METHODS:
+            if supports(pattern, method):
+                routes.setdefault((method, name), kwargs)
+    return routes
+
+
+def budget_name(method, name):
+    # GET routes keep their bare names from before POST routes were measured
+    return name if method == 'get' else f"{method.upper()} {name}"
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every GET and POST API route against seeded data at two sizes and '
+        'fail if query counts grow with the data or exceed the checked-in budgets.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=2, help='Rows per relation in the small data set.')
+        parser.add_argument('--large', type=int, default=8, help='Rows per relation in the large data set.')
+        parser.add_argument(
+            '--baseline',
+            default=str(Path(settings.BASE_DIR) / 'query_budgets.json'),
+            help='JSON file mapping route names to query budgets.',
+        )
+        parser.add_argument('--update', action='store_true', help='Rewrite the baseline with current counts.')
+
+    def handle(self, *args, **options):
+        baseline_path = Path(options['baseline'])
+        budgets = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+
+        with isolated_environment():
+            small_counts = self.measure_size(options['small'])
+            large_counts = self.measure_size(options['large'])
+        counts = {
+            name: (small_counts.get(name), large_counts.get(name))
+            for name in small_counts.keys() | large_counts.keys()
+        }
+
+        failures = []
+        for name, (small, large) in sorted(counts.items()):
+            budget = budgets.get(name)
+            problems = []
+            if small is None or large is None:
+                problems.append('request failed')
+            else:
+                if large > small:
+                    problems.append(f"grows with result size ({small} -> {large})")
+                if not options['update']:
+                    if budget is None:
+                        problems.append('no budget in baseline')
+                    elif large > budget:
+                        problems.append(f"over budget ({large} > {budget})")
+            status = '; '.join(problems) or 'ok'
+            self.stdout.write(f"{name:45} {small!s:>6} {large!s:>6} {budget!s:>7}  {status}")
+            if problems:
+                failures.append(f"{name}: {status}")
+
+        if options['update']:
+            baseline = {name: large for name, (small, large) in sorted(counts.items()) if large is not None}
+            baseline_path.write_text(json.dumps(baseline, indent=2) + '\n')
+            self.stdout.write(f"Wrote {len(baseline)} budgets to {baseline_path}")
+
+        if failures:
+            raise CommandError('Query budget check failed:\n' + '\n'.join(failures))
+
+    def measure_size(self, size):
+        counts = {}
+        # Roll the fixtures back so the next size starts from an empty database
+        with transaction.atomic():
+            viewer, others = seed_fixtures(size)
+            client = APIClient()
+            client.force_authenticate(viewer)
+            # Async views authenticate the Bearer token themselves
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {BlacklistRefreshToken.for_user(viewer).access_token}")
+            ids = {}
+            routes = get_routes()
+
+            # Reads before writes, and lists first so detail routes can reuse an id from their list
+            for (method, name), kwargs in sorted(
+                routes.items(), key=lambda item: (item[0][0] != 'get', bool(item[1]), item[0][1])
+            ):
+                label = budget_name(method, name)
+                if name in UNMEASURABLE_ROUTES:
+                    self.stderr.write(f"Skipping {label}: {UNMEASURABLE_ROUTES[name]}")
+                    continue
+                url = self.resolve(name, kwargs, ids)
+                if url is None:
+                    self.stderr.write(f"Skipping {label}: no object to request")
+                    continue
+                if method == 'get':
+                    params = ROUTE_PARAMS.get(name, lambda *args: {})(viewer, others)
+                    response = self.measure(client.get, url, params, label, size, counts)
+                    if response is not None and name.endswith('-list'):
+                        ids[name[:-len('-list')]] = self.first_id(response)
+                    for variant, extra in ROUTE_VARIANTS.get(name, {}).items():
+                        self.measure(client.get, url, {**params, **extra}, f"{name}?{variant}", size, counts)
+                elif name not in ROUTE_PAYLOADS:
+                    self.stderr.write(f"{label} has no payload in ROUTE_PAYLOADS")
+                    counts[label] = None
+                else:
+                    data = ROUTE_PAYLOADS[name](viewer, others)
+                    body_format = 'multipart' if name in MULTIPART_ROUTES else 'json'
+                    self.measure(client.post, url, data, label, size, counts, format=body_format)
+            transaction.set_rollback(True)
+        return counts
+
+    def measure(self, request, url, data, name, size, counts, **kwargs):
+        """Record the queries one uncached request runs; return its response unless it failed."""
+        cache.clear()
+        local_user_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = request(url, data, **kwargs)
+            # Streamed bodies, such as archives, run their queries as they are read
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if response.status_code >= 400:
+            self.stderr.write(f"{name} returned {response.status_code} at size {size}")
+            counts[name] = None
+            return None
+        counts[name] = len(queries)
+        return response
+
+    def resolve(self, name, kwargs, ids):
+        if not kwargs:
+            return reverse(name)
+        if kwargs != {'pk'}:
+            return None
+        # 'shared-file-detail' and 'file-download' take ids from their basename's list
+        basename = name
+        while '-' in basename:
+            basename = basename.rsplit('-', 1)[0]
+            if ids.get(basename) is not None:
+                try:
+                    return reverse(name, kwargs={'pk': ids[basename]})
+                except NoReverseMatch:
+                    return None
+        return None
+
+    def first_id(self, response):
+        data = response.data
+        results = data.get('results', []) if isinstance(data, dict) else data
+        return results[0]['id'] if results else None
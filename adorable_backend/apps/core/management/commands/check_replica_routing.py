@@ -0,0 +1,92 @@
+import json
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from apps.core.middleware import user_pin_key
+from apps.core.testing import REPLICA_ALIAS, isolated_environment
+from apps.users.models import User
+
+PASSWORD = 'replica-check-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the API against a primary and a separately migrated replica that '
+        'never catches up, and fail unless every client reads its own writes.'
+    )
+
+    def handle(self, *args, **options):
+        with isolated_environment(replica=True):
+            self.client = Client()
+            failures = [name for name, passed in self.checks() if not passed]
+        if failures:
+            raise CommandError('Replica routing check failed:\n' + '\n'.join(failures))
+
+    def checks(self):
+        # Only the primary has this user; the replica never will
+        User.objects.create_user(username='replica-check', email='replica@example.com', password=PASSWORD)
+
+        status, tokens, _ = self.request('post', '/api/users/auth/login/', {
+            'email': 'replica@example.com', 'password': PASSWORD,
+        })
+        yield self.report('login succeeds on the primary', status == 200)
+        access = tokens.get('access')
+
+        status, _, replica_reads = self.request('get', '/api/users/auth/profile/', token=access)
+        yield self.report('first Bearer read after a login is pinned', status == 200 and not replica_reads)
+
+        status, location, _ = self.request('post', '/api/locations/', {
+            'name': 'Pinned', 'address': '1 Primary Road', 'latitude': '1.5',
+            'longitude': '2.5', 'type': 'home',
+        }, token=access)
+        yield self.report('write through the API succeeds', status == 201)
+
+        _, refreshed, _ = self.request('post', '/api/users/auth/refresh/', {'refresh': tokens.get('refresh')})
+        status, locations, _ = self.request('get', '/api/locations/', token=refreshed.get('access'))
+        yield self.report(
+            'a refreshed token still reads its own write',
+            status == 200 and locations.get('count') == 1
+        )
+
+        _, registered, _ = self.request('post', '/api/users/auth/register/', {
+            'email': 'replica-new@example.com', 'password': PASSWORD, 'confirm_password': PASSWORD,
+        })
+        status, _, _ = self.request('get', '/api/users/auth/profile/', token=registered.get('access'))
+        yield self.report('first Bearer read after registering is pinned', status == 200)
+
+        # Writes bump list versions of users they do not pin, e.g. share recipients
+        self.request('post', '/api/locations/', {
+            'name': 'Second', 'address': '2 Primary Road', 'latitude': '1.5',
+            'longitude': '2.5', 'type': 'work',
+        }, token=access)
+        cache.delete(user_pin_key(location.get('user')))
+        status, locations, _ = self.request('get', '/api/locations/', token=access)
+        yield self.report(
+            'an unpinned list cache miss is built from the primary',
+            status == 200 and locations.get('count') == 2
+        )
+
+        # Once the pins lapse, uncached reads go to the replica and miss the new rows
+        cache.clear()
+        status, _, replica_reads = self.request('get', f"/api/locations/{location.get('id')}/", token=access)
+        yield self.report('reads go to the replica once the pin expires', status == 404 and replica_reads > 0)
+
+    def request(self, method, path, data=None, token=None):
+        """Return ``(status, body, queries run on the replica)``."""
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {token}"} if token else {}
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            if data is None:
+                response = getattr(self.client, method)(path, **headers)
+            else:
+                response = getattr(self.client, method)(
+                    path, json.dumps(data), content_type='application/json', **headers
+                )
+        is_json = response.get('Content-Type', '').startswith('application/json')
+        body = json.loads(response.content) if is_json and response.content else {}
+        return response.status_code, body, len(replica_queries)
+
+    def report(self, name, passed):
+        self.stdout.write(f"{name:55} {'ok' if passed else 'FAILED'}")
+        return name, passed
@@ -0,0 +1,361 @@
+import heapq
+import itertools
+import random
+import time
+from array import array
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Count, Exists, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from apps.core.fixtures import PNG_1PX
+from apps.locations.models import Location
+from apps.social.models import Block, Follow, Report
+from apps.storage.models import File, SharedFile
+
+User = get_user_model()
+
+FIRST_NAMES = ['Ada', 'Ben', 'Chioma', 'Dev', 'Elif', 'Femi', 'Grace', 'Hiro', 'Ines', 'Jon', 'Kemi', 'Lena']
+LAST_NAMES = ['Adeyemi', 'Brown', 'Chen', 'Diaz', 'Eze', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jones']
+LOCATION_TYPES = ['home', 'work', 'favorite', 'other']
+REPORT_TYPES = [choice for choice, _ in Report.REPORT_TYPES]
+SHARE_PERMISSIONS = [choice for choice, _ in SharedFile.PERMISSION_CHOICES]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def next_id(model):
+    return (model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0) + 1
+
+
+def scaled_count(rng, average):
+    """An integer count whose expectation is ``average``."""
+    whole = int(average)
+    return whole + (rng.random() < average - whole)
+
+
+class Progress:
+    def __init__(self, stdout, label, total):
+        self.stdout = stdout
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+
+    def advance(self, count):
+        self.done += count
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        percent = f" ({self.done / self.total:.0%})" if self.total else ''
+        self.stdout.write(
+            f"  {self.label}: {self.done:,}/~{self.total:,}{percent}, {self.done / elapsed:,.0f} rows/s"
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset: users, locations, power-law '
+        'follows, blocks, reports, files and shares. Rows are inserted in chunks '
+        'with COPY on PostgreSQL and bulk_create elsewhere.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--avg-follows', type=float, default=20.0, help='Mean follows per user.')
+        parser.add_argument(
+            '--popularity-exponent', type=float, default=1.0,
+            help='Zipf exponent for how strongly follows concentrate on popular users.'
+        )
+        parser.add_argument('--avg-locations', type=float, default=2.0)
+        parser.add_argument('--block-rate', type=float, default=0.02, help='Blocks per user.')
+        parser.add_argument('--report-rate', type=float, default=0.005, help='Reports per user.')
+        parser.add_argument('--avg-files', type=float, default=1.0)
+        parser.add_argument('--share-rate', type=float, default=0.3, help='Share of files that get shared.')
+        parser.add_argument('--blobs', type=int, default=8, help='Distinct stored blobs the file rows point at.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--password', default='synthetic-password', help='Password set on every user.')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('At least two users are needed.')
+        self.options = options
+        self.chunk_size = options['chunk_size']
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        started = time.monotonic()
+
+        user_ids = self.create_users()
+        self.create_locations(user_ids)
+        self.create_follows(user_ids)
+        self.create_blocks(user_ids)
+        self.update_follow_counts(user_ids)
+        self.create_reports(user_ids)
+        file_ids, file_owners = self.create_files(user_ids)
+        self.create_shares(user_ids, file_ids, file_owners)
+        self.reset_sequences()
+
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.monotonic() - started:,.1f}s"))
+
+    def rng(self, stage):
+        # One stream per stage, so changing one stage's options leaves the others unchanged
+        return random.Random(f"{self.options['seed']}:{stage}")
+
+    def insert(self, model, objects, label, total):
+        progress = Progress(self.stdout, label, total)
+        for chunk in chunked(objects, self.chunk_size):
+            if self.use_copy:
+                self.copy(model, chunk)
+            else:
+                model.objects.bulk_create(chunk)
+            progress.advance(len(chunk))
+
+    def copy(self, model, objects):
+        """Stream rows through COPY, preparing values exactly as an INSERT would."""
+        fields = model._meta.concrete_fields
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for obj in objects:
+                    copy.write_row([
+                        field.get_db_prep_save(field.pre_save(obj, True), connection)
+                        for field in fields
+                    ])
+
+    def create_users(self):
+        rng = self.rng('users')
+        count = self.options['users']
+        first_id = next_id(User)
+        password = make_password(self.options['password'])
+
+        def users():
+            for pk in range(first_id, first_id + count):
+                yield User(
+                    pk=pk,
+                    username=f"synthetic{pk}",
+                    email=f"synthetic{pk}@example.com",
+                    password=password,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                )
+
+        self.insert(User, users(), 'users', count)
+        return range(first_id, first_id + count)
+
+    def create_locations(self, user_ids):
+        rng = self.rng('locations')
+        average = self.options['avg_locations']
+        first_id = next_id(Location)
+
+        def locations():
+            pk = first_id
+            for user_id in user_ids:
+                for index in range(scaled_count(rng, average)):
+                    yield Location(
+                        pk=pk,
+                        user_id=user_id,
+                        name=f"Place {index + 1}",
+                        address=f"{rng.randint(1, 999)} Synthetic Street",
+                        city='Lagos',
+                        country='Nigeria',
+                        postal_code=f"{rng.randint(100000, 999999)}",
+                        latitude=Decimal(f"{rng.uniform(-90, 90):.6f}"),
+                        longitude=Decimal(f"{rng.uniform(-180, 180):.6f}"),
+                        type=rng.choice(LOCATION_TYPES),
+                        is_primary=index == 0,
+                    )
+                    pk += 1
+
+        self.insert(Location, locations(), 'locations', int(len(user_ids) * average))
+
+    def create_follows(self, user_ids):
+        """Out-degrees are Pareto distributed and targets Zipf weighted by popularity."""
+        rng = self.rng('follows')
+        average = self.options['avg_follows']
+        exponent = self.options['popularity_exponent']
+        first_id = next_id(Follow)
+
+        # Shuffle so popularity does not simply follow the id order
+        by_popularity = list(user_ids)
+        rng.shuffle(by_popularity)
+        weights = [1 / (rank + 1) ** exponent for rank in range(len(by_popularity))]
+        cum_weights = list(itertools.accumulate(weights))
+        # Pareto with shape 2 has mean 2 * scale
+        scale = average / 2
+        max_degree = len(user_ids) - 1
+
+        def pick_targets(follower_id, degree):
+            """``degree`` distinct popularity-weighted targets other than the follower."""
+            if degree > max_degree // 2:
+                # Rejection would stall on the long tail; weighted sampling without
+                # replacement (Efraimidis-Spirakis) takes one pass instead
+                keyed = (
+                    (rng.random() ** (1 / weight), user_id)
+                    for user_id, weight in zip(by_popularity, weights)
+                    if user_id != follower_id
+                )
+                return {user_id for _, user_id in heapq.nlargest(degree, keyed)}
+            targets = set()
+            while len(targets) < degree:
+                targets.update(rng.choices(by_popularity, cum_weights=cum_weights, k=degree - len(targets)))
+                targets.discard(follower_id)
+            return targets
+
+        def follows():
+            pk = first_id
+            for follower_id in user_ids:
+                # Rounded stochastically so the mean degree stays at ``average``
+                degree = min(max_degree, scaled_count(rng, scale * rng.paretovariate(2)))
+                if not degree:
+                    continue
+                for followed_id in sorted(pick_targets(follower_id, degree)):
+                    yield Follow(pk=pk, follower_id=follower_id, followed_id=followed_id)
+                    pk += 1
+
+        self.insert(Follow, follows(), 'follows', int(len(user_ids) * average))
+
+    def create_blocks(self, user_ids):
+        rng = self.rng('blocks')
+        count = int(len(user_ids) * self.options['block_rate'])
+        first_id = next_id(Block)
+        pairs = set()
+        while len(pairs) < count:
+            blocker_id, blocked_id = rng.sample(user_ids, 2)
+            pairs.add((blocker_id, blocked_id))
+
+        self.insert(
+            Block,
+            (
+                Block(pk=pk, blocker_id=blocker_id, blocked_id=blocked_id)
+                for pk, (blocker_id, blocked_id) in enumerate(sorted(pairs), first_id)
+            ),
+            'blocks',
+            count,
+        )
+        # Block.save drops follows in both directions; bulk inserts have to do it here
+        Follow.objects.filter(
+            Exists(Block.objects.filter(
+                Q(blocker=OuterRef('follower'), blocked=OuterRef('followed')) |
+                Q(blocker=OuterRef('followed'), blocked=OuterRef('follower'))
+            ))
+        ).delete()
+
+    def update_follow_counts(self, user_ids):
+        def count_of(field):
+            return Coalesce(
+                Subquery(
+                    Follow.objects.filter(**{field: OuterRef('pk')})
+                    .order_by()
+                    .values(field)
+                    .annotate(count=Count('pk'))
+                    .values('count')
+                ),
+                0
+            )
+
+        progress = Progress(self.stdout, 'follow counts', len(user_ids))
+        step = self.chunk_size
+        for start in range(user_ids.start, user_ids.stop, step):
+            stop = min(start + step, user_ids.stop)
+            User.objects.filter(pk__gte=start, pk__lt=stop).update(
+                followers_count=count_of('followed'),
+                following_count=count_of('follower'),
+            )
+            progress.advance(stop - start)
+
+    def create_reports(self, user_ids):
+        rng = self.rng('reports')
+        count = int(len(user_ids) * self.options['report_rate'])
+        first_id = next_id(Report)
+
+        def reports():
+            for pk in range(first_id, first_id + count):
+                reporter_id, reported_id = rng.sample(user_ids, 2)
+                yield Report(
+                    pk=pk,
+                    reporter_id=reporter_id,
+                    reported_id=reported_id,
+                    type=rng.choice(REPORT_TYPES),
+                    description='Synthetic report',
+                    status=rng.choices(['pending', 'resolved', 'dismissed'], weights=[6, 3, 1])[0],
+                )
+
+        self.insert(Report, reports(), 'reports', count)
+
+    def create_files(self, user_ids):
+        """File rows point at a handful of shared blobs so downloads work."""
+        rng = self.rng('files')
+        average = self.options['avg_files']
+        blobs = []
+        for index in range(max(self.options['blobs'], 1)):
+            name = f"synthetic/blob-{index}.png"
+            # Reruns reuse the blobs instead of piling up suffixed copies
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(PNG_1PX))
+            blobs.append(name)
+        first_id = next_id(File)
+        # File id -> owner id, as compact machine ints rather than Python objects
+        owners = array('q')
+
+        def files():
+            pk = first_id
+            for user_id in user_ids:
+                for _ in range(scaled_count(rng, average)):
+                    owners.append(user_id)
+                    yield File(
+                        pk=pk,
+                        user_id=user_id,
+                        file=rng.choice(blobs),
+                        file_type='image',
+                        original_name=f"photo-{pk}.png",
+                        size=len(PNG_1PX),
+                        mime_type='image/png',
+                        title=f"Photo {pk}",
+                        is_public=rng.random() < 0.1,
+                    )
+                    pk += 1
+
+        self.insert(File, files(), 'files', int(len(user_ids) * average))
+        return range(first_id, first_id + len(owners)), owners
+
+    def create_shares(self, user_ids, file_ids, file_owners):
+        rng = self.rng('shares')
+        rate = self.options['share_rate']
+        first_id = next_id(SharedFile)
+
+        def shares():
+            pk = first_id
+            for file_id, owner_id in zip(file_ids, file_owners):
+                if rng.random() >= rate:
+                    continue
+                recipients = {rng.choice(user_ids) for _ in range(rng.randint(1, 3))}
+                recipients.discard(owner_id)
+                for recipient_id in sorted(recipients):
+                    yield SharedFile(
+                        pk=pk,
+                        file_id=file_id,
+                        shared_by_id=owner_id,
+                        shared_with_id=recipient_id,
+                        permission=rng.choice(SHARE_PERMISSIONS),
+                    )
+                    pk += 1
+
+        self.insert(SharedFile, shares(), 'shares', int(len(file_ids) * rate * 2))
+
+    def reset_sequences(self):
+        # Explicit ids bypass the PostgreSQL sequences; SQLite tracks them itself
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Location, Follow, Block, Report, File, SharedFile]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,189 @@
+import os
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LABELS = ['view', 'action']
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Total request time', LABELS, buckets=TIME_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries per request', LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+)
+DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request', LABELS, buckets=TIME_BUCKETS
+)
+SERIALIZER_SECONDS = Histogram(
+    'http_request_serializer_seconds', 'Time spent in serializer .data per request', LABELS,
+    buckets=TIME_BUCKETS
+)
+RENDER_SECONDS = Histogram(
+    'http_request_render_seconds', 'Time spent rendering the response', LABELS, buckets=TIME_BUCKETS
+)
+RESPONSE_BYTES = Histogram(
+    'http_response_size_bytes', 'Response body size', LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+
+# Metrics for the request being handled, set by RequestMetricsMiddleware
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, record_queries=False):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.render_started = None
+        self.render_time = 0.0
+        self.queries = [] if record_queries else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.db_time += duration
+            if self.queries is not None:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'ms': round(duration * 1000, 2),
+                })
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def end_render(self, response):
+        if self.render_started is not None:
+            self.render_time += time.perf_counter() - self.render_started
+            self.render_started = None
+        return response
+
+
+def get_current_metrics():
+    return _current.get()
+
+
+def set_current_metrics(metrics):
+    return _current.set(metrics)
+
+
+def reset_current_metrics(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper on every connection; counts queries into the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def instrument_connections():
+    """Install ``record_query`` on each database connection as it opens.
+
+    Under ASGI, sync views and the async ORM query from worker threads with
+    connections of their own, so wrapping the request thread's connections
+    would miss them. The metrics still reach those threads through the
+    context variable.
+    """
+    from django.db.backends.signals import connection_created
+
+    def install(sender, connection, **kwargs):
+        if record_query not in connection.execute_wrappers:
+            # First, so execute_wrapper() blocks that are open keep popping their own
+            connection.execute_wrappers.insert(0, record_query)
+
+    connection_created.connect(install, weak=False, dispatch_uid='apps.core.metrics.install')
+
+
+def instrument_serializers():
+    """Time top-level ``serializer.data`` calls for the current request.
+
+    Nested serializers go through ``to_representation`` rather than
+    ``.data``, so only the outermost serialization of a response is counted.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if getattr(data.fget, 'instrumented', False):
+        return
+
+    def timed_data(serializer):
+        metrics = _current.get()
+        if metrics is None:
+            return data.fget(serializer)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - start
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+def observe(labels, metrics, response_size):
+    REQUEST_SECONDS.labels(*labels).observe(metrics.elapsed)
+    DB_QUERIES.labels(*labels).observe(metrics.query_count)
+    DB_SECONDS.labels(*labels).observe(metrics.db_time)
+    SERIALIZER_SECONDS.labels(*labels).observe(metrics.serializer_time)
+    RENDER_SECONDS.labels(*labels).observe(metrics.render_time)
+    if response_size is not None:
+        RESPONSE_BYTES.labels(*labels).observe(response_size)
+
+
+def server_timing(metrics):
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.query_count} queries"',
+        f'ser;dur={metrics.serializer_time * 1000:.1f}',
+        f'render;dur={metrics.render_time * 1000:.1f}',
+        f'total;dur={metrics.elapsed * 1000:.1f}',
+    ])
+
+
+def metrics_view(request):
+    """Prometheus exposition, aggregated across workers in multiprocess mode.
+
+    Requires ``Bearer METRICS_AUTH_TOKEN``; without a token configured it
+    is only served with ``DEBUG`` on.
+    """
+    token = settings.METRICS_AUTH_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f"Bearer {token}"):
+        return HttpResponseForbidden()
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        output = generate_latest(registry)
+    else:
+        output = generate_latest()
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import random
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+from .metrics import (
+    RequestMetrics,
+    get_current_metrics,
+    observe,
+    reset_current_metrics,
+    server_timing,
+    set_current_metrics,
+)
+from .routers import RoutingState, reset_routing_state, set_routing_state
+
+slow_request_logger = logging.getLogger('apps.core.slow_requests')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def bearer_user_id(request):
+    """User id of a valid Bearer access token; only the signature is checked."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token)[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+
+def user_pin_key(user_id):
+    return f"db:pin:user:{user_id}"
+
+
+def replica_pin_key(request, user_id=None):
+    """Pin key of a client: its user when known, else its session cookie or address.
+
+    Keying by user lets every token and login of one account share a pin.
+    """
+    if user_id is not None:
+        return user_pin_key(user_id)
+    credentials = (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+    return f"db:pin:{hashlib.sha256(credentials.encode()).hexdigest()}"
+
+
+def pin_to_primary(request, user_id):
+    """Pin ``user_id`` once this response goes out, e.g. after login or registration.
+
+    Those requests carry no Bearer token, so the pin the follow-up requests
+    look up would otherwise never be set.
+    """
+    # The middleware sees the HttpRequest beneath a DRF Request
+    request = getattr(request, '_request', request)
+    request.replica_pins = getattr(request, 'replica_pins', set()) | {user_id}
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe requests to read replicas, except right after the client wrote.
+
+    Any request that writes pins its client to the primary for
+    ``REPLICA_PIN_SECONDS`` so it always reads its own writes, longer than
+    the replicas are expected to lag.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        pin_key = replica_pin_key(request, bearer_user_id(request))
+        state = RoutingState(request.method in SAFE_METHODS and not cache.get(pin_key))
+        token = set_routing_state(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_routing_state(token)
+
+        pins = self.pins(request, state, pin_key)
+        if pins:
+            cache.set_many(pins, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        pin_key = replica_pin_key(request, bearer_user_id(request))
+        state = RoutingState(request.method in SAFE_METHODS and not await cache.aget(pin_key))
+        # ORM calls made through sync_to_async copy this context, state included
+        token = set_routing_state(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_routing_state(token)
+
+        pins = self.pins(request, state, pin_key)
+        if pins:
+            await cache.aset_many(pins, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def pins(self, request, state, pin_key):
+        keys = {user_pin_key(user_id) for user_id in getattr(request, 'replica_pins', ())}
+        if state.wrote or request.method not in SAFE_METHODS:
+            keys.add(pin_key)
+        return dict.fromkeys(keys, 1)
+
+
+def request_labels(request, response):
+    """``(view, action)`` labels: the URL name plus the DRF action when there is one."""
+    match = request.resolver_match
+    view_name = match.view_name if match else 'unresolved'
+    view = getattr(response, 'renderer_context', {}).get('view')
+    action = getattr(view, 'action', None) or request.method.lower()
+    return view_name, action
+
+
+class RequestMetricsMiddleware:
+    """Record per-route SQL, serializer and render timings for every request.
+
+    Timings go to Prometheus histograms and, when ``SERVER_TIMING`` is on, a
+    ``Server-Timing`` header. A ``SLOW_REQUEST_SAMPLE_RATE`` share of requests
+    also keep their SQL and are logged if slower than
+    ``SLOW_REQUEST_THRESHOLD_MS``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.new_metrics()
+        token = set_current_metrics(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_current_metrics(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.new_metrics()
+        # Worker threads running the view or async ORM calls copy this context
+        token = set_current_metrics(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_current_metrics(token)
+        return self.finish(request, response, metrics)
+
+    def new_metrics(self):
+        threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+        sampled = threshold is not None and random.random() < settings.SLOW_REQUEST_SAMPLE_RATE
+        return RequestMetrics(record_queries=sampled)
+
+    def finish(self, request, response, metrics):
+        labels = request_labels(request, response)
+        observe(labels, metrics, None if response.streaming else len(response.content))
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics)
+        threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+        if metrics.queries is not None and metrics.elapsed * 1000 >= threshold:
+            self.log_slow_request(request, response, labels, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = get_current_metrics()
+        if metrics is not None:
+            metrics.start_render()
+            response.add_post_render_callback(metrics.end_render)
+        return response
+
+    def log_slow_request(self, request, response, labels, metrics):
+        slow_request_logger.warning(
+            'Slow request %s %s (%s %s) %s in %.0f ms: %d queries, %.0f ms SQL, '
+            '%.0f ms serializing, %.0f ms rendering\n%s',
+            request.method,
+            request.get_full_path(),
+            *labels,
+            response.status_code,
+            metrics.elapsed * 1000,
+            metrics.query_count,
+            metrics.db_time * 1000,
+            metrics.serializer_time * 1000,
+            metrics.render_time * 1000,
+            '\n'.join(f"[{query['alias']} {query['ms']} ms] {query['sql']}" for query in metrics.queries),
+        )
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that stays async under ASGI.
+
+    Plain WhiteNoise is sync only, which forces every request below it
+    (async views included) back onto a thread. Lookups are in-memory dict
+    hits unless autorefresh is on, so only that case needs a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
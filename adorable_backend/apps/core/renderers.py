@@ -0,0 +1,50 @@
+from decimal import Decimal
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+_json_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Encode types orjson and msgpack lack natively, as DRF's JSONEncoder would."""
+    if isinstance(obj, Decimal):
+        # Match DecimalField so raw and serialized decimals (e.g. coordinates)
+        # come out the same and keep their precision
+        return str(obj) if api_settings.COERCE_DECIMAL_TO_STRING else float(obj)
+    return _json_encoder.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Drop-in for ``JSONRenderer`` that encodes with orjson.
+
+    Output is compact UTF-8 like DRF's defaults, with UTC datetimes ending
+    in ``Z``. An ``indent`` Accept parameter switches to two-space indents.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        # The browsable API asks for indentation through the context
+        if (renderer_context or {}).get('indent') or 'indent' in (accepted_media_type or ''):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_default, option=option)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """``application/msgpack`` for clients that ask for it, with JSON-compatible values."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
@@ -0,0 +1,70 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set by ReplicaRoutingMiddleware for the duration of a request
+_routing = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def set_routing_state(state):
+    return _routing.set(state)
+
+
+def reset_routing_state(token):
+    _routing.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Send the reads in this block to the primary, whatever the request allows."""
+    state = _routing.get()
+    if state is None or not state.use_replica:
+        yield
+        return
+    state.use_replica = False
+    try:
+        yield
+    finally:
+        state.use_replica = True
+
+
+class ReplicaRouter:
+    """Send reads to a random replica while the current request allows it.
+
+    Anything outside a routed request (shell, Celery, migrations), any read
+    after the request has written, and any read inside a transaction on the
+    primary stays on ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (
+            state is None
+            or not state.use_replica
+            or state.wrote
+            or not settings.DATABASE_REPLICAS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any of them may relate
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
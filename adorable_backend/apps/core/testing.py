@@ -0,0 +1,150 @@
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase, override_settings
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.views import APIView
+from apps.users.authentication import local_user_cache
+
+
+@contextmanager
+def capture_view_transactions(using=DEFAULT_DB_ALIAS):
+    """Record, each time a DRF view starts handling a request, whether it runs in a transaction.
+
+    Only transactions opened after entering the block count, so a
+    ``TestCase``'s own does not; ones the view opens later, e.g. around a
+    bulk insert, are not the request's.
+    """
+    connection = connections[using]
+    outer = len(connection.atomic_blocks)
+    states = []
+    initial = APIView.initial
+
+    def record(view, request, *args, **kwargs):
+        states.append(len(connection.atomic_blocks) > outer)
+        return initial(view, request, *args, **kwargs)
+
+    with mock.patch.object(APIView, 'initial', record):
+        yield states
+
+
+def assert_transaction_policy(client, method, path, atomic, **kwargs):
+    """Request ``path`` and assert whether the endpoint runs in a transaction.
+
+    Usage from a test::
+
+        assert_transaction_policy(self.client, 'get', '/api/locations/', atomic=False)
+        assert_transaction_policy(self.client, 'post', '/api/locations/', atomic=True, data=...)
+    """
+    with capture_view_transactions() as states:
+        response = getattr(client, method.lower())(path, **kwargs)
+    if any(states) != atomic:
+        raise AssertionError(
+            f"{method.upper()} {path} {'did not run' if atomic else 'ran'} in a transaction "
+            f"(status {response.status_code})"
+        )
+    return response
+
+
+REPLICA_ALIAS = 'replica'
+
+
+def add_replica_alias():
+    """Register a second database configured like ``default`` but never mirrored.
+
+    Nothing replicates into it, so it behaves like a replica that lags forever.
+    """
+    default = connections.settings[DEFAULT_DB_ALIAS]
+    # No creation-order dependency on 'default', which may already exist
+    test = {**default.get('TEST', {}), 'MIRROR': None, 'DEPENDENCIES': []}
+    if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+        test['NAME'] = f"test_{default['NAME']}_{REPLICA_ALIAS}"
+    connections.settings[REPLICA_ALIAS] = {**default, 'TEST': test}
+
+
+def remove_replica_alias():
+    connections[REPLICA_ALIAS].close()
+    del connections[REPLICA_ALIAS]
+    del connections.settings[REPLICA_ALIAS]
+
+
+def local_services(media_root, rate_limiter='apps.core.throttling.InMemoryRateLimiter'):
+    """Settings that swap Redis and S3 for in-process caches, limits, storage and uploads."""
+    storage = {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': media_root}}
+    return override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        RATE_LIMIT_BACKEND=rate_limiter,
+        STORAGES={**settings.STORAGES, 'default': storage, 'cold': storage},
+        MEDIA_ROOT=media_root,
+        TOKEN_BLACKLIST_BACKEND='apps.users.blacklist.InMemoryTokenBlacklist',
+        DIRECT_UPLOAD_BACKEND='apps.storage.uploads.InMemoryDirectUploadBackend',
+        SLOW_REQUEST_THRESHOLD_MS=None,
+    )
+
+
+# Process-wide in-memory stand-ins, rebuilt whenever their setting changes
+PER_TEST_SERVICES = ('RATE_LIMIT_BACKEND', 'TOKEN_BLACKLIST_BACKEND', 'DIRECT_UPLOAD_BACKEND')
+
+
+class LocalServicesTestCase(TestCase):
+    """TestCase run against ``local_services``, with empty caches and services per test."""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media_root.cleanup)
+        overrides = local_services(media_root.name)
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        local_user_cache.clear()
+        services = override_settings(**{name: getattr(settings, name) for name in PER_TEST_SERVICES})
+        services.enable()
+        self.addCleanup(services.disable)
+
+
+@contextmanager
+def isolated_environment(rate_limiter='apps.core.throttling.InMemoryRateLimiter', replica=False):
+    """Run against a throwaway test database with local cache, storage and limits.
+
+    Used by the management commands that drive the API in-process, so they
+    never touch real data or need Redis and S3. With ``replica`` a second,
+    separately migrated database is routed to as the only read replica.
+    Called from a test, it reuses the test run's database.
+    """
+    # Under ``manage.py test`` the test environment and databases already exist
+    nested = hasattr(mail, 'outbox')
+    with tempfile.TemporaryDirectory() as media_root:
+        aliases = set() if nested else {DEFAULT_DB_ALIAS}
+        if replica:
+            add_replica_alias()
+            aliases.add(REPLICA_ALIAS)
+        if not nested:
+            setup_test_environment()
+        # The replica router only migrates 'default'
+        with override_settings(DATABASE_ROUTERS=[]):
+            old_config = setup_databases(verbosity=0, interactive=False, aliases=aliases)
+        try:
+            with local_services(media_root, rate_limiter), override_settings(
+                DATABASE_REPLICAS=[REPLICA_ALIAS] if replica else []
+            ):
+                yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            if replica:
+                remove_replica_alias()
+            if not nested:
+                teardown_test_environment()
@@ -0,0 +1,144 @@
+import threading
+import time
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+
+class RateLimiter:
+    """Token buckets refilled continuously at ``limit / duration`` per second."""
+
+    def hit(self, key, limit, duration):
+        """Take one token from ``key``; return ``(allowed, seconds_until_next_token)``."""
+        raise NotImplementedError
+
+
+# Refill, take and persist in a single atomic step on the server. Redis'
+# own clock is used so app servers with skewed clocks agree.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """One ``EVALSHA`` round trip per request, safe under any concurrency."""
+
+    key_prefix = 'ratelimit:'
+
+    def __init__(self, alias=None):
+        from django_redis import get_redis_connection
+        client = get_redis_connection(alias or settings.RATE_LIMIT_CACHE)
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def hit(self, key, limit, duration):
+        allowed, wait = self.script(keys=[f"{self.key_prefix}{key}"], args=[limit, limit / duration])
+        return bool(allowed), float(wait)
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """Process-local implementation for tests and single-process development."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, duration):
+        rate = limit / duration
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + (now - ts) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self._buckets[key] = (tokens, now)
+        return False, (1 - tokens) / rate
+
+
+class NullRateLimiter(RateLimiter):
+    """Allows everything; for load tests that measure the API rather than the limits."""
+
+    def hit(self, key, limit, duration):
+        return True, 0.0
+
+
+_limiter = None
+
+
+def get_rate_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = import_string(settings.RATE_LIMIT_BACKEND)()
+    return _limiter
+
+
+@receiver(setting_changed)
+def reset_rate_limiter(*, setting, **kwargs):
+    global _limiter
+    if setting == 'RATE_LIMIT_BACKEND':
+        _limiter = None
+
+
+class BucketRateThrottle(throttling.SimpleRateThrottle):
+    """``SimpleRateThrottle`` whose history lives in a shared token bucket.
+
+    Mixed in after a DRF throttle so its ``get_cache_key`` and scope
+    handling are reused while the read-modify-write happens server side.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self._wait = get_rate_limiter().hit(self.key, self.num_requests, self.duration)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, BucketRateThrottle):
+    pass
+
+
+class UserRateThrottle(throttling.UserRateThrottle, BucketRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, BucketRateThrottle):
+    """Applies the rate named by a view's ``throttle_scope``, if it sets one."""
+
+
+def check_rate(scope, ident):
+    """Throttle outside DRF (e.g. async views). Returns ``(allowed, wait)``."""
+    rate = throttling.SimpleRateThrottle.THROTTLE_RATES.get(scope)
+    if rate is None:
+        return True, 0.0
+    limit, duration = throttling.SimpleRateThrottle.parse_rate(None, rate)
+    key = throttling.SimpleRateThrottle.cache_format % {'scope': scope, 'ident': ident}
+    return get_rate_limiter().hit(key, limit, duration)
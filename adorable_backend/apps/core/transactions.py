@@ -0,0 +1,34 @@
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+ATOMIC = 'atomic'
+NON_ATOMIC = 'none'
+
+
+class TransactionPolicyMixin:
+    """Wrap a request in a transaction according to the view's policy.
+
+    By default reads run in autocommit and writes run atomically.
+    ``transaction_policy`` overrides that per viewset action (or per HTTP
+    method on plain API views), e.g. ``{'archive': NON_ATOMIC}``.
+    """
+    transaction_policy = {}
+
+    def get_transaction_policy(self, request):
+        method = request.method.lower()
+        # Viewsets know their action before dispatch; plain views use the method
+        action_map = getattr(self, 'action_map', None) or {}
+        name = action_map.get(method, method)
+        if name in self.transaction_policy:
+            return self.transaction_policy[name]
+        return NON_ATOMIC if request.method in SAFE_METHODS else ATOMIC
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.get_transaction_policy(request) != ATOMIC:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            # DRF only rolls back by itself under ATOMIC_REQUESTS
+            if getattr(response, 'exception', False):
+                transaction.set_rollback(True)
+        return response
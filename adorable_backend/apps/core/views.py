@@ -0,0 +1,114 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, Throttled
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from apps.users.authentication import CachedJWTAuthentication
+
+
+class AsyncAPIView(View):
+    """Base for async API endpoints that mostly wait on storage, Redis or SMTP.
+
+    Under ASGI these run on the event loop instead of holding a worker
+    thread. The JWT user comes from the auth cache or the async ORM, unless
+    ``authentication_class`` is None.
+    Requests go through DRF's parsers, content negotiation, throttle
+    classes and exception handler, so handlers read ``request.data`` and
+    return a ``Response`` just as DRF views do. Handlers must be ``async def``.
+    """
+    http_method_names = ['post', 'options']
+    authentication_class = CachedJWTAuthentication
+    authentication_required = True
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    content_negotiation_class = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS
+    throttle_scope = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Bearer tokens, not cookies, authenticate these views; async views
+        # cannot run inside ATOMIC_REQUESTS
+        return csrf_exempt(transaction.non_atomic_requests(super().as_view(**initkwargs)))
+
+    def get_renderers(self):
+        # The browsable API introspects DRF's own views and cannot render these
+        return [
+            renderer() for renderer in self.renderer_classes
+            if not issubclass(renderer, BrowsableAPIRenderer)
+        ]
+
+    def get_throttles(self):
+        return [throttle() for throttle in self.throttle_classes]
+
+    def check_throttles(self, request):
+        """Take a token from every throttle's bucket; return the longest wait, or None."""
+        waits = [
+            throttle.wait() for throttle in self.get_throttles()
+            if not throttle.allow_request(request, self)
+        ]
+        return max(waits) if waits else None
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args, self.kwargs = args, kwargs
+        request = Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            negotiator=self.content_negotiation_class()
+        )
+        self.request = request
+        try:
+            await self.initial(request)
+            response = await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            response = self.handle_exception(request, exc)
+        return self.finalize_response(request, response)
+
+    async def initial(self, request):
+        renderers = self.get_renderers()
+        request.accepted_renderer, request.accepted_media_type = (
+            request.negotiator.select_renderer(request, renderers)
+        )
+
+        authenticated = None
+        if self.authentication_class is not None:
+            authenticated = await self.authentication_class().aauthenticate(request)
+        request.user, request.auth = authenticated or (AnonymousUser(), None)
+        if self.authentication_required and not request.user.is_authenticated:
+            raise NotAuthenticated()
+
+        wait = await sync_to_async(self.check_throttles)(request)
+        if wait is not None:
+            raise Throttled(wait)
+
+    def get_renderer_context(self):
+        return {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': self.request}
+
+    def handle_exception(self, request, exc):
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            # Bearer is the only scheme, so a missing or bad token is always a 401
+            exc.status_code = status.HTTP_401_UNAUTHORIZED
+        response = api_settings.EXCEPTION_HANDLER(exc, self.get_renderer_context())
+        if response.status_code == status.HTTP_401_UNAUTHORIZED and self.authentication_class is not None:
+            response['WWW-Authenticate'] = self.authentication_class().authenticate_header(request)
+        return response
+
+    def finalize_response(self, request, response):
+        if isinstance(response, Response):
+            if not getattr(request, 'accepted_renderer', None):
+                # Negotiation itself failed; answer in the default format
+                renderer = self.get_renderers()[0]
+                request.accepted_renderer, request.accepted_media_type = renderer, renderer.media_type
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+        patch_vary_headers(response, ['Accept'])
+        return response
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
@@ -67,6 +67,8 @@ class Location(models.Model):
     
     def save(self, *args, **kwargs):
         """Ensure only one primary location per user."""
-        if self.is_primary:
-            Location.objects.filter(user=self.user).update(is_primary=False)
-        super().save(*args, **kwargs) 
\ No newline at end of file
+        # Savepoint inside a request transaction, a transaction of its own otherwise
+        with transaction.atomic():
+            if self.is_primary:
+                Location.objects.filter(user=self.user).update(is_primary=False)
+            super().save(*args, **kwargs) 
\ No newline at end of file
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from apps.core.fieldsets import SparseFieldsetMixin
 from .models import Location
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Location
         fields = ('id', 'user', 'name', 'address', 'latitude', 'longitude', 
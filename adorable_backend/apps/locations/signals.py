@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.core.listcache import bump_list_versions
+from .models import Location
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_lists(sender, instance, **kwargs):
+    # Location.save also clears is_primary on the user's other rows, same user
+    bump_list_versions('locations', [instance.user_id])
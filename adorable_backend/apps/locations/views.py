@@ -2,6 +2,9 @@ from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters import rest_framework as filters
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.core.listcache import CachedListMixin
+from apps.core.transactions import TransactionPolicyMixin
 from .models import Location
 from .serializers import LocationSerializer
 
@@ -15,8 +18,9 @@ class LocationFilter(filters.FilterSet):
             'address': ['icontains'],
         }
 
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(TransactionPolicyMixin, CachedListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = LocationSerializer
+    list_cache_resource = 'locations'
     permission_classes = [permissions.IsAuthenticated]
     filterset_class = LocationFilter
     search_fields = ['name', 'address']
@@ -28,7 +32,7 @@ class LocationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def primary(self, request):
-        location = self.get_queryset().filter(is_primary=True).first()
+        location = self.select_fields(self.get_queryset().filter(is_primary=True)).first()
         if location:
             serializer = self.get_serializer(location)
             return Response(serializer.data)
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class SocialConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.social'
-    verbose_name = 'Social' 
\ No newline at end of file
+    verbose_name = 'Social'
+
+    def ready(self):
+        from . import signals  # noqa: F401
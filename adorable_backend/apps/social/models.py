@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
@@ -58,12 +58,14 @@ class Block(models.Model):
         return f"{self.blocker.username} blocked {self.blocked.username}"
 
     def save(self, *args, **kwargs):
-        # When blocking a user, remove any existing follow relationships
-        Follow.objects.filter(
-            models.Q(follower=self.blocker, followed=self.blocked) |
-            models.Q(follower=self.blocked, followed=self.blocker)
-        ).delete()
-        super().save(*args, **kwargs)
+        # When blocking a user, remove any existing follow relationships;
+        # the savepoint keeps the follows if the block itself fails to save
+        with transaction.atomic():
+            Follow.objects.filter(
+                models.Q(follower=self.blocker, followed=self.blocked) |
+                models.Q(follower=self.blocked, followed=self.blocker)
+            ).delete()
+            super().save(*args, **kwargs)
 
 
 class Report(models.Model):
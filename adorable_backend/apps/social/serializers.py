@@ -1,10 +1,14 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core import signing
+from apps.core.fieldsets import SparseFieldsetMixin
+from apps.storage.uploads import load_evidence
 from .models import Follow, Block, Report
 
 User = get_user_model()
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = ('id', 'follower', 'followed', 'created_at')
@@ -14,7 +18,7 @@ class FollowSerializer(serializers.ModelSerializer):
         validated_data['follower'] = self.context['request'].user
         return super().create(validated_data)
 
-class BlockSerializer(serializers.ModelSerializer):
+class BlockSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Block
         fields = ('id', 'blocker', 'blocked', 'reason', 'created_at')
@@ -24,14 +28,29 @@ class BlockSerializer(serializers.ModelSerializer):
         validated_data['blocker'] = self.context['request'].user
         return super().create(validated_data)
 
-class ReportSerializer(serializers.ModelSerializer):
+class ReportSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    evidence_upload = serializers.CharField(write_only=True, required=False)
+
     class Meta:
         model = Report
         fields = ('id', 'reporter', 'reported', 'type', 'description', 
-                 'evidence', 'status', 'created_at', 'updated_at')
+                 'evidence', 'evidence_upload', 'status', 'created_at', 'updated_at')
         read_only_fields = ('id', 'reporter', 'status', 'created_at', 'updated_at')
 
+    def validate_evidence_upload(self, value):
+        # Token issued by the storage app once a direct upload was verified
+        try:
+            evidence = load_evidence(value, max_age=settings.DIRECT_UPLOAD_EXPIRY)
+        except signing.BadSignature:
+            raise serializers.ValidationError('Invalid or expired evidence upload.')
+        if evidence['user'] != self.context['request'].user.pk:
+            raise serializers.ValidationError('Invalid or expired evidence upload.')
+        return evidence['key']
+
     def create(self, validated_data):
+        evidence_key = validated_data.pop('evidence_upload', None)
+        if evidence_key:
+            validated_data['evidence'] = evidence_key
         validated_data['reporter'] = self.context['request'].user
         validated_data['status'] = 'pending'
         return super().create(validated_data) 
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.core.listcache import bump_list_versions
+from .models import Block, Follow
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_lists(sender, instance, **kwargs):
+    # Both sides list the follow, as follower and as followed
+    bump_list_versions('follows', [instance.follower_id, instance.followed_id])
+
+
+@receiver(post_save, sender=Block)
+@receiver(post_delete, sender=Block)
+def invalidate_block_lists(sender, instance, **kwargs):
+    bump_list_versions('blocks', [instance.blocker_id])
@@ -2,11 +2,15 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.core.listcache import CachedListMixin
+from apps.core.transactions import TransactionPolicyMixin
 from .models import Follow, Block, Report
 from .serializers import FollowSerializer, BlockSerializer, ReportSerializer
 
-class FollowViewSet(viewsets.ModelViewSet):
+class FollowViewSet(TransactionPolicyMixin, CachedListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = FollowSerializer
+    list_cache_resource = 'follows'
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -14,18 +18,23 @@ class FollowViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def followers(self, request):
-        followers = Follow.objects.filter(followed=request.user)
-        serializer = self.get_serializer(followers, many=True)
-        return Response(serializer.data)
+        followers = self.select_fields(Follow.objects.filter(followed=request.user))
+        return self.cached_list_response(
+            request,
+            lambda: Response(self.get_serializer(followers, many=True).data)
+        )
 
     @action(detail=False, methods=['get'])
     def following(self, request):
-        following = Follow.objects.filter(follower=request.user)
-        serializer = self.get_serializer(following, many=True)
-        return Response(serializer.data)
+        following = self.select_fields(Follow.objects.filter(follower=request.user))
+        return self.cached_list_response(
+            request,
+            lambda: Response(self.get_serializer(following, many=True).data)
+        )
 
-class BlockViewSet(viewsets.ModelViewSet):
+class BlockViewSet(TransactionPolicyMixin, CachedListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = BlockSerializer
+    list_cache_resource = 'blocks'
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -33,11 +42,13 @@ class BlockViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def blocked_users(self, request):
-        blocked = self.get_queryset()
-        serializer = self.get_serializer(blocked, many=True)
-        return Response(serializer.data)
+        blocked = self.select_fields(self.get_queryset())
+        return self.cached_list_response(
+            request,
+            lambda: Response(self.get_serializer(blocked, many=True).data)
+        )
 
-class ReportViewSet(viewsets.ModelViewSet):
+class ReportViewSet(TransactionPolicyMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated]
 
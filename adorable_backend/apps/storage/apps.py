@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class StorageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.storage'
-    verbose_name = 'Storage' 
\ No newline at end of file
+    verbose_name = 'Storage'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,118 @@
+import os
+import zipfile
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+CHUNK_SIZE = 64 * 1024
+
+# Formats that are already compressed gain nothing from deflate
+COMPRESSED_EXTENSIONS = {
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'heic', 'pdf', 'docx',
+    'mp3', 'm4a', 'aac', 'ogg', 'mp4', 'mov', 'webm', 'zip', 'gz',
+}
+COMPRESSED_FILE_TYPES = {'image', 'video', 'audio'}
+
+
+class ZipStreamBuffer:
+    """Write-only, non-seekable sink that hands written bytes back to the caller.
+
+    Without ``seek`` zipfile falls back to data descriptors, so entries can be
+    emitted as soon as they are written and nothing is buffered beyond a chunk.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def get_compress_type(file):
+    """Store already-compressed media as-is, deflate everything else."""
+    ext = os.path.splitext(file.original_name or file.file.name)[1].lstrip('.').lower()
+    if ext in COMPRESSED_EXTENSIONS or file.file_type in COMPRESSED_FILE_TYPES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def get_archive_names(files):
+    """Return a unique archive member name for every file."""
+    seen = set()
+    names = []
+    for file in files:
+        name = os.path.basename(file.original_name or file.file.name) or str(file.pk)
+        root, ext = os.path.splitext(name)
+        counter = 1
+        while name in seen:
+            name = f"{root} ({counter}){ext}"
+            counter += 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def stream_zip(files, open_file=None):
+    """Yield a ZIP archive of ``files`` chunk by chunk without a temp file.
+
+    ``open_file`` returns a readable file object for a ``File`` and defaults
+    to opening its storage file directly.
+    """
+    open_file = open_file or (lambda file: file.file.open('rb'))
+    buffer = ZipStreamBuffer()
+
+    with zipfile.ZipFile(buffer, mode='w', allowZip64=True) as archive:
+        for file, name in zip(files, get_archive_names(files)):
+            info = zipfile.ZipInfo(
+                name,
+                date_time=timezone.localtime(file.updated_at).timetuple()[:6]
+            )
+            info.compress_type = get_compress_type(file)
+            info.file_size = file.size
+
+            source = open_file(file)
+            try:
+                with archive.open(info, mode='w') as dest:
+                    while True:
+                        chunk = source.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            finally:
+                source.close()
+            yield buffer.drain()
+
+    yield buffer.drain()
+
+
+async def astream_zip(files, open_file=None):
+    """Async version of ``stream_zip`` for responses served over ASGI.
+
+    Django reads a sync iterator into a list before an ASGI response starts,
+    which would buffer the whole archive; here each chunk is produced on a
+    worker thread and sent before the next one is built.
+    """
+    chunks = stream_zip(files, open_file=open_file)
+    # Restoring cold files touches the database, so keep the request's thread
+    next_chunk = sync_to_async(next)
+    while True:
+        chunk = await next_chunk(chunks, None)
+        if chunk is None:
+            break
+        yield chunk
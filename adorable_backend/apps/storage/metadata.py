@@ -0,0 +1,325 @@
+import io
+import mmap
+import re
+import zlib
+from contextlib import contextmanager
+from PIL import Image, UnidentifiedImageError
+
+HEADER_SIZE = 64 * 1024
+
+# (offset, magic bytes, mime type, file type)
+SIGNATURES = [
+    (0, b'\xff\xd8\xff', 'image/jpeg', 'image'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png', 'image'),
+    (0, b'GIF87a', 'image/gif', 'image'),
+    (0, b'GIF89a', 'image/gif', 'image'),
+    (8, b'WEBP', 'image/webp', 'image'),
+    (0, b'%PDF-', 'application/pdf', 'document'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword', 'document'),
+    (0, b'PK\x03\x04', 'application/zip', 'other'),
+    (4, b'ftyp', 'video/mp4', 'video'),
+    (0, b'ID3', 'audio/mpeg', 'audio'),
+    (0, b'OggS', 'audio/ogg', 'audio'),
+]
+
+DOCX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+EXIF_TAGS = {
+    0x010F: 'camera_make',
+    0x0110: 'camera_model',
+    0x0112: 'orientation',
+    0x0132: 'taken_at',
+}
+
+PDF_VERSION_PATTERN = re.compile(rb'%PDF-(\d+\.\d+)')
+PDF_LINEARIZED_PATTERN = re.compile(rb'/Linearized[^>]*?/N\s+(\d+)')
+PDF_STARTXREF_PATTERN = re.compile(rb'startxref\s+(\d+)')
+PDF_SUBSECTION_PATTERN = re.compile(rb'(\d+)\s+(\d+)[ \t]*(?:\r\n|\r|\n)')
+PDF_ENTRY_PATTERN = re.compile(rb'(\d{10}) (\d{5}) ([nf])')
+PDF_ROOT_PATTERN = re.compile(rb'/Root\s+(\d+)\s+\d+\s+R')
+PDF_PAGES_PATTERN = re.compile(rb'/Pages\s+(\d+)\s+\d+\s+R')
+PDF_PREV_PATTERN = re.compile(rb'/Prev\s+(\d+)')
+PDF_COUNT_PATTERN = re.compile(rb'/Count\s+(\d+)')
+# Indirect stream lengths are not followed
+PDF_LENGTH_PATTERN = re.compile(rb'/Length\s+(\d+)\b(?!\s+\d+\s+R)')
+PDF_WIDTHS_PATTERN = re.compile(rb'/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]')
+PDF_INDEX_PATTERN = re.compile(rb'/Index\s*\[([\d\s]*)\]')
+PDF_SIZE_PATTERN = re.compile(rb'/Size\s+(\d+)')
+PDF_PREDICTOR_PATTERN = re.compile(rb'/Predictor\s+(\d+)')
+PDF_COLUMNS_PATTERN = re.compile(rb'/Columns\s+(\d+)')
+PDF_FIRST_PATTERN = re.compile(rb'/First\s+(\d+)')
+
+PDF_CHUNK_SIZE = 4096
+PDF_TAIL_SIZE = 2048
+# Most a page count may read from (or inflate out of) one file
+PDF_READ_LIMIT = 256 * 1024
+PDF_INFLATE_LIMIT = 1024 * 1024
+PDF_MAX_SECTIONS = 16
+
+
+def sniff(header):
+    """Return ``(mime_type, file_type)`` from magic bytes, or ``(None, None)``."""
+    for offset, magic, mime_type, file_type in SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            # Office Open XML documents are zip archives with a word/ part
+            if mime_type == 'application/zip' and b'word/' in header:
+                return DOCX_MIME_TYPE, 'document'
+            return mime_type, file_type
+    return None, None
+
+
+@contextmanager
+def open_content(file):
+    """Yield ``(data, complete)`` for a stored file without reading all of it.
+
+    Local files are memory-mapped so parsers only fault in the pages they
+    touch; remote files fall back to a single header-sized ranged read.
+    """
+    storage = file.file.storage
+    try:
+        path = storage.path(file.file.name)
+    except NotImplementedError:
+        path = None
+
+    if path is not None:
+        with open(path, 'rb') as fh:
+            try:
+                data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                yield b'', True
+                return
+            try:
+                yield data, True
+            finally:
+                data.close()
+        return
+
+    with storage.open(file.file.name, 'rb') as fh:
+        yield fh.read(HEADER_SIZE), False
+
+
+def image_metadata(data):
+    try:
+        image = Image.open(io.BytesIO(data) if isinstance(data, bytes) else data)
+    except (UnidentifiedImageError, OSError):
+        return {}
+
+    metadata = {
+        'width': image.width,
+        'height': image.height,
+        'format': image.format,
+        'mode': image.mode,
+    }
+    try:
+        exif = image.getexif()
+    except (OSError, SyntaxError):
+        exif = {}
+    metadata['has_exif'] = bool(exif)
+    for tag, key in EXIF_TAGS.items():
+        value = exif.get(tag)
+        if isinstance(value, (str, int)):
+            metadata[key] = value.strip('\x00 ') if isinstance(value, str) else value
+    return metadata
+
+
+def pdf_int(pattern, data):
+    match = pattern.search(data)
+    if match is None:
+        raise ValueError(f"No {pattern.pattern!r} in PDF data")
+    return int(match.group(1))
+
+
+def unpredict(data, columns):
+    """Undo the PNG row predictors cross-reference streams use (None and Up)."""
+    rows = []
+    previous = bytes(columns)
+    for start in range(0, len(data), columns + 1):
+        kind, row = data[start], data[start + 1:start + 1 + columns]
+        if len(row) < columns:
+            break
+        if kind == 2:
+            row = bytes((a + b) & 0xFF for a, b in zip(row, previous))
+        elif kind != 0:
+            raise ValueError(f"Unsupported PNG predictor {kind}")
+        rows.append(row)
+        previous = row
+    return b''.join(rows)
+
+
+class PdfReader:
+    """Find the page tree of a random-access PDF through its cross-reference data.
+
+    Only the trailer, the xref sections and the few objects on the way to
+    the page tree root are read, capped at ``PDF_READ_LIMIT`` bytes, so the
+    count also works when pages live in compressed object streams.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.remaining = PDF_READ_LIMIT
+        # Newest first: (first, count, offset) tables or {number: entry} dicts
+        self.sections = []
+        self.root = None
+
+    def read(self, start, length):
+        end = min(start + length, len(self.data), start + self.remaining)
+        if start < 0 or end <= start:
+            raise ValueError('PDF read out of range or over the read limit')
+        self.remaining -= end - start
+        return bytes(self.data[start:end])
+
+    def page_count(self):
+        self.load_xref()
+        catalog = self.object(self.root)
+        return pdf_int(PDF_COUNT_PATTERN, self.object(pdf_int(PDF_PAGES_PATTERN, catalog)))
+
+    def load_xref(self):
+        tail = self.read(max(len(self.data) - PDF_TAIL_SIZE, 0), PDF_TAIL_SIZE)
+        offsets = PDF_STARTXREF_PATTERN.findall(tail)
+        if not offsets:
+            raise ValueError('No startxref in PDF tail')
+        offset, seen = int(offsets[-1]), set()
+        # Incremental updates chain older sections through /Prev
+        while offset is not None and offset not in seen and len(seen) < PDF_MAX_SECTIONS:
+            seen.add(offset)
+            head = self.read(offset, PDF_CHUNK_SIZE)
+            if head.startswith(b'xref'):
+                trailer = self.load_table(offset + 4)
+            else:
+                trailer = self.load_stream(offset, head)
+            if self.root is None:
+                self.root = pdf_int(PDF_ROOT_PATTERN, trailer)
+            prev = PDF_PREV_PATTERN.search(trailer)
+            offset = int(prev.group(1)) if prev else None
+
+    def load_table(self, position):
+        """Index a classic xref table by its subsection headers; returns the trailer."""
+        while True:
+            chunk = self.read(position, 64)
+            stripped = chunk.lstrip()
+            position += len(chunk) - len(stripped)
+            if stripped.startswith(b'trailer'):
+                trailer = self.read(position, PDF_CHUNK_SIZE)
+                return trailer.split(b'startxref')[0]
+            match = PDF_SUBSECTION_PATTERN.match(stripped)
+            if match is None:
+                raise ValueError('Malformed xref subsection')
+            first, count = int(match.group(1)), int(match.group(2))
+            position += match.end()
+            # Entries are fixed 20-byte lines, so they are only read on lookup
+            self.sections.append((first, count, position))
+            position += count * 20
+
+    def load_stream(self, offset, head):
+        """Decode a cross-reference stream; its dictionary doubles as the trailer."""
+        dictionary, data = self.stream(offset, head)
+        widths = PDF_WIDTHS_PATTERN.search(dictionary)
+        if widths is None:
+            raise ValueError('No /W in PDF xref stream')
+        widths = [int(width) for width in widths.groups()]
+        index = PDF_INDEX_PATTERN.search(dictionary)
+        if index:
+            bounds = [int(value) for value in index.group(1).split()]
+        else:
+            bounds = [0, pdf_int(PDF_SIZE_PATTERN, dictionary)]
+
+        entries, position, row_size = {}, 0, sum(widths)
+        for first, count in zip(bounds[0::2], bounds[1::2]):
+            for number in range(first, first + count):
+                row = data[position:position + row_size]
+                if len(row) < row_size:
+                    break
+                position += row_size
+                fields, start = [], 0
+                for width in widths:
+                    fields.append(int.from_bytes(row[start:start + width], 'big'))
+                    start += width
+                # A zero-width type field means every entry is in use
+                entries[number] = (fields[0] if widths[0] else 1, fields[1], fields[2])
+        self.sections.append(entries)
+        return dictionary
+
+    def stream(self, offset, head=None):
+        """Return ``(dictionary, decoded data)`` of the stream object at ``offset``."""
+        head = head or self.read(offset, PDF_CHUNK_SIZE)
+        start = head.find(b'stream')
+        if start < 0:
+            raise ValueError('No stream in PDF object')
+        dictionary = head[:start]
+        start += len(b'stream')
+        start += 2 if head[start:start + 2] == b'\r\n' else 1
+        data = self.read(offset + start, pdf_int(PDF_LENGTH_PATTERN, dictionary))
+
+        if b'/FlateDecode' in dictionary:
+            data = zlib.decompressobj().decompress(data, PDF_INFLATE_LIMIT)
+        elif b'/Filter' in dictionary:
+            raise ValueError('Unsupported PDF stream filter')
+        predictor = PDF_PREDICTOR_PATTERN.search(dictionary)
+        if predictor and int(predictor.group(1)) >= 10:
+            data = unpredict(data, pdf_int(PDF_COLUMNS_PATTERN, dictionary))
+        return dictionary, data
+
+    def locate(self, number):
+        for section in self.sections:
+            if isinstance(section, dict):
+                if number in section:
+                    return section[number]
+                continue
+            first, count, position = section
+            if first <= number < first + count:
+                match = PDF_ENTRY_PATTERN.match(self.read(position + (number - first) * 20, 20))
+                if match is None:
+                    raise ValueError('Malformed xref entry')
+                return (1 if match.group(3) == b'n' else 0, int(match.group(1)), 0)
+        raise ValueError(f"PDF object {number} is not in the xref")
+
+    def object(self, number):
+        kind, first, second = self.locate(number)
+        if kind == 1:
+            chunk = self.read(first, PDF_CHUNK_SIZE)
+            return chunk.split(b'endobj')[0]
+        if kind != 2:
+            raise ValueError(f"PDF object {number} is free")
+
+        # Compressed objects live in an object stream: a header of number/offset pairs
+        container = self.locate(first)
+        if container[0] != 1:
+            raise ValueError('PDF object stream is not stored directly')
+        dictionary, data = self.stream(container[1])
+        start = pdf_int(PDF_FIRST_PATTERN, dictionary)
+        offsets = [int(value) for value in data[:start].split()[1::2]]
+        if second >= len(offsets):
+            raise ValueError('PDF object stream index out of range')
+        end = start + offsets[second + 1] if second + 1 < len(offsets) else len(data)
+        return data[start + offsets[second]:end]
+
+
+def pdf_metadata(data, complete):
+    metadata = {}
+    version = PDF_VERSION_PATTERN.match(data[:16])
+    if version:
+        metadata['pdf_version'] = version.group(1).decode()
+    if complete:
+        try:
+            metadata['pages'] = PdfReader(data).page_count()
+        except (ValueError, zlib.error):
+            pass
+    if 'pages' not in metadata:
+        # Linearized files state the page count in their first object
+        linearized = PDF_LINEARIZED_PATTERN.search(data[:PDF_CHUNK_SIZE])
+        if linearized:
+            metadata['pages'] = int(linearized.group(1))
+    return metadata
+
+
+def extract_metadata(file):
+    """Return ``(mime_type, file_type, metadata)`` for a stored file."""
+    with open_content(file) as (data, complete):
+        mime_type, file_type = sniff(data[:HEADER_SIZE])
+        metadata = {'kind': file_type or 'other'}
+        if file_type == 'image':
+            metadata.update(image_metadata(data))
+        elif mime_type == 'application/pdf':
+            metadata.update(pdf_metadata(data, complete))
+    return mime_type, file_type, metadata
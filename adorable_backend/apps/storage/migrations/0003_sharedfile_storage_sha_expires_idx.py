@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sharedfile',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at'], name='storage_sha_expires_idx'),
+        ),
+    ]
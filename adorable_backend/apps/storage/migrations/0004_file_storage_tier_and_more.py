@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0003_sharedfile_storage_sha_expires_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], default='hot', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['storage_tier', 'last_accessed'], name='storage_fil_storage_af115d_idx'),
+        ),
+    ]
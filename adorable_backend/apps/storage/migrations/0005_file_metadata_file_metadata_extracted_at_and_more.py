@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:51
+
+from django.db import migrations, models
+
+
+def create_metadata_gin_index(apps, schema_editor):
+    # JSON containment lookups on metadata are only indexable on PostgreSQL
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS storage_file_metadata_gin '
+            'ON storage_file USING gin (metadata jsonb_path_ops)'
+        )
+
+
+def drop_metadata_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS storage_file_metadata_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0004_file_storage_tier_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='metadata_extracted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['user', 'mime_type'], name='storage_fil_user_id_2e6c3d_idx'),
+        ),
+        migrations.RunPython(create_metadata_gin_index, drop_metadata_gin_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0005_file_metadata_file_metadata_extracted_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(condition=models.Q(('metadata_extracted_at__isnull', True)), fields=['created_at'], name='storage_fil_pending_meta_idx'),
+        ),
+    ]
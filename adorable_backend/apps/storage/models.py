@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 import uuid
 
 
@@ -23,6 +24,13 @@ class File(models.Model):
         ('other', _('Other')),
     ]
     
+    TIER_HOT = 'hot'
+    TIER_COLD = 'cold'
+    STORAGE_TIERS = [
+        (TIER_HOT, _('Hot')),
+        (TIER_COLD, _('Cold')),
+    ]
+    
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -43,6 +51,9 @@ class File(models.Model):
     title = models.CharField(max_length=255, blank=True)
     description = models.TextField(blank=True)
     tags = models.JSONField(default=list)
+    # Extracted from the file content in the background, see metadata.py
+    metadata = models.JSONField(default=dict, blank=True)
+    metadata_extracted_at = models.DateTimeField(null=True, blank=True)
     
     # Privacy settings
     is_public = models.BooleanField(default=False)
@@ -52,6 +63,7 @@ class File(models.Model):
     # Usage tracking
     download_count = models.PositiveIntegerField(default=0)
     last_accessed = models.DateTimeField(null=True, blank=True)
+    storage_tier = models.CharField(max_length=10, choices=STORAGE_TIERS, default=TIER_HOT)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -64,6 +76,14 @@ class File(models.Model):
         indexes = [
             models.Index(fields=['user', 'file_type']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['storage_tier', 'last_accessed']),
+            models.Index(fields=['user', 'mime_type']),
+            # Only files still waiting for metadata are swept
+            models.Index(
+                fields=['created_at'],
+                name='storage_fil_pending_meta_idx',
+                condition=models.Q(metadata_extracted_at__isnull=True)
+            ),
         ]
     
     def __str__(self):
@@ -78,6 +98,27 @@ class File(models.Model):
         return f"{self.size:.1f} TB"
 
 
+class SharedFileQuerySet(models.QuerySet):
+    """Query helpers for share expiry."""
+
+    def active(self):
+        """Shares that have no expiry or have not expired yet."""
+        return self.filter(
+            models.Q(expires_at__isnull=True) |
+            models.Q(expires_at__gt=timezone.now())
+        )
+
+    def expired(self):
+        """Shares whose expiry time has passed."""
+        return self.filter(expires_at__lte=timezone.now())
+
+    def next_expiry(self):
+        """When the first of these shares that is still active expires, or None."""
+        return self.filter(expires_at__gt=timezone.now()).aggregate(
+            next_expiry=models.Min('expires_at')
+        )['next_expiry']
+
+
 class SharedFile(models.Model):
     """Model for tracking file sharing."""
     
@@ -115,11 +156,21 @@ class SharedFile(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
+    objects = SharedFileQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('shared file')
         verbose_name_plural = _('shared files')
         unique_together = ('file', 'shared_with')
         ordering = ['-created_at']
+        indexes = [
+            # Only shares with an expiry are ever swept or range-filtered
+            models.Index(
+                fields=['expires_at'],
+                name='storage_sha_expires_idx',
+                condition=models.Q(expires_at__isnull=False)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.file.original_name} shared with {self.shared_with.username}" 
\ No newline at end of file
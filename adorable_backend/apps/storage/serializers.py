@@ -1,31 +1,45 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.base import ContentFile
+from apps.core.fieldsets import SparseFieldsetMixin
 from .models import File, SharedFile
+from .uploads import PURPOSE_EVIDENCE, PURPOSE_FILE, load_upload
 
 User = get_user_model()
 
-class FileSerializer(serializers.ModelSerializer):
+class FileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     download_url = serializers.SerializerMethodField()
     
     class Meta:
         model = File
         fields = ('id', 'user', 'file', 'file_type', 'original_name', 'size', 'mime_type',
                  'title', 'description', 'tags', 'is_public', 'password_protected',
-                 'download_count', 'last_accessed', 'created_at', 'updated_at', 'download_url')
-        read_only_fields = ('id', 'user', 'size', 'mime_type', 'download_count',
-                          'last_accessed', 'created_at', 'updated_at', 'download_url')
+                 'metadata', 'download_count', 'last_accessed', 'storage_tier', 'created_at',
+                 'updated_at', 'download_url')
+        read_only_fields = ('id', 'user', 'size', 'mime_type', 'metadata', 'download_count',
+                          'last_accessed', 'storage_tier', 'created_at', 'updated_at',
+                          'download_url')
+        field_sources = {'download_url': ('file', 'storage_tier')}
 
     def get_download_url(self, obj):
+        # Cold files have no object at their URL until /download/ restores them
         request = self.context.get('request')
-        if request is not None:
+        if request is not None and obj.storage_tier == File.TIER_HOT:
             return request.build_absolute_uri(obj.file.url)
         return None
 
     def create(self, validated_data):
+        upload = validated_data['file']
         validated_data['user'] = self.context['request'].user
+        # Provisional values until extract_file_metadata sniffs the content
+        validated_data['size'] = upload.size
+        validated_data['mime_type'] = getattr(upload, 'content_type', None) or ''
         return super().create(validated_data)
 
-class SharedFileSerializer(serializers.ModelSerializer):
+class SharedFileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     file_details = FileSerializer(source='file', read_only=True)
     
     class Meta:
@@ -33,7 +47,88 @@ class SharedFileSerializer(serializers.ModelSerializer):
         fields = ('id', 'file', 'file_details', 'shared_by', 'shared_with',
                  'permission', 'can_reshare', 'expires_at', 'created_at', 'updated_at')
         read_only_fields = ('id', 'shared_by', 'created_at', 'updated_at')
+        # The embedded file is only sent with ?expand=file_details
+        expandable_fields = ('file_details',)
 
     def create(self, validated_data):
         validated_data['shared_by'] = self.context['request'].user
-        return super().create(validated_data) 
\ No newline at end of file
+        return super().create(validated_data)
+
+class FileArchiveSerializer(serializers.Serializer):
+    MAX_FILES = 500
+
+    files = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_FILES
+    )
+
+    def validate_files(self, value):
+        return list(dict.fromkeys(value))
+
+class BulkShareSerializer(serializers.Serializer):
+    MAX_FILES = 100
+    MAX_RECIPIENTS = 100
+
+    files = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_FILES
+    )
+    shared_with = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_RECIPIENTS
+    )
+    permission = serializers.ChoiceField(choices=SharedFile.PERMISSION_CHOICES, default='view')
+    can_reshare = serializers.BooleanField(default=False)
+    expires_at = serializers.DateTimeField(required=False, allow_null=True)
+
+    def validate_files(self, value):
+        return list(dict.fromkeys(value))
+
+    def validate_shared_with(self, value):
+        return list(dict.fromkeys(value))
+
+class DirectUploadSerializer(serializers.Serializer):
+    purpose = serializers.ChoiceField(choices=[PURPOSE_FILE, PURPOSE_EVIDENCE], default=PURPOSE_FILE)
+    original_name = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+    md5 = serializers.RegexField(r'^[0-9a-fA-F]{32}$')
+    file_type = serializers.ChoiceField(choices=File.FILE_TYPES, default='other')
+    title = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    tags = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    is_public = serializers.BooleanField(default=False)
+
+    def validate_original_name(self, value):
+        # Apply the same extension rules as a regular multipart upload
+        for validator in File._meta.get_field('file').validators:
+            try:
+                validator(ContentFile(b'', name=value))
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError(exc.messages)
+        return value
+
+    def validate_size(self, value):
+        if value > settings.DIRECT_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'File is larger than {settings.DIRECT_UPLOAD_MAX_SIZE} bytes.'
+            )
+        return value
+
+    def validate_md5(self, value):
+        return value.lower()
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    upload = serializers.CharField()
+
+    def validate_upload(self, value):
+        try:
+            upload = load_upload(value)
+        except signing.BadSignature:
+            raise serializers.ValidationError('Invalid or expired upload token.')
+        if upload['user'] != self.context['request'].user.pk:
+            raise serializers.ValidationError('Invalid or expired upload token.')
+        return upload
@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.core.listcache import bump_list_versions
+from .models import File, SharedFile
+
+
+def file_audience(file_ids):
+    """Owners of these files and everyone they are shared with."""
+    owners = File.objects.filter(pk__in=file_ids).values_list('user_id', flat=True)
+    recipients = SharedFile.objects.filter(file_id__in=file_ids).values_list('shared_with_id', flat=True)
+    return {*owners, *recipients}
+
+
+def invalidate_file_lists(file_ids, user_ids=()):
+    """Drop cached file and share lists showing these files.
+
+    Called directly by code that changes files with ``update()``, which
+    sends no signals.
+    """
+    user_ids = file_audience(file_ids) | set(user_ids)
+    # Share lists embed the file, so they go stale with it
+    bump_list_versions('files', user_ids)
+    bump_list_versions('shared', user_ids)
+
+
+def invalidate_share_lists(shared_by_id, shared_with_ids):
+    bump_list_versions('shared', [shared_by_id, *shared_with_ids])
+    # Recipients see shared files in their file list too
+    bump_list_versions('files', shared_with_ids)
+
+
+@receiver(post_save, sender=File)
+def invalidate_lists_on_file_save(sender, instance, **kwargs):
+    invalidate_file_lists([instance.pk])
+
+
+@receiver(post_delete, sender=File)
+def invalidate_lists_on_file_delete(sender, instance, **kwargs):
+    # Cascaded shares send their own post_delete for the recipients
+    invalidate_file_lists([], [instance.user_id])
+
+
+@receiver(post_save, sender=SharedFile)
+@receiver(post_delete, sender=SharedFile)
+def invalidate_lists_on_share_change(sender, instance, **kwargs):
+    invalidate_share_lists(instance.shared_by_id, [instance.shared_with_id])
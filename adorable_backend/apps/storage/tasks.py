@@ -0,0 +1,103 @@
+import logging
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .metadata import extract_metadata
+from .models import File, SharedFile
+from .signals import invalidate_file_lists
+from .tiering import freeze
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_expired_shares(batch_size=None, max_batches=None):
+    """Delete expired shares in small batches, each in its own short transaction."""
+    batch_size = batch_size or settings.SHARE_EXPIRY_SWEEP_BATCH_SIZE
+    max_batches = max_batches or settings.SHARE_EXPIRY_SWEEP_MAX_BATCHES
+    deleted = 0
+
+    for _ in range(max_batches):
+        # Walk the partial expires_at index oldest-first
+        ids = list(
+            SharedFile.objects.expired()
+            .order_by('expires_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            count, _ = SharedFile.objects.filter(pk__in=ids).delete()
+        deleted += count
+        if len(ids) < batch_size:
+            break
+
+    return deleted
+
+
+@shared_task
+def migrate_cold_files(days=None, batch_size=None):
+    """Move files that have not been accessed for ``days`` days to the cold tier."""
+    days = days or settings.STORAGE_COLD_AFTER_DAYS
+    batch_size = batch_size or settings.STORAGE_TIERING_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+
+    candidates = File.objects.filter(storage_tier=File.TIER_HOT).filter(
+        Q(last_accessed__lt=cutoff) |
+        Q(last_accessed__isnull=True, created_at__lt=cutoff)
+    ).order_by('last_accessed', 'pk')[:batch_size]
+
+    return sum(1 for file in candidates.iterator() if freeze(file))
+
+
+@shared_task
+def extract_file_metadata(file_id):
+    """Sniff the real type of an uploaded file and store its metadata."""
+    file = File.objects.filter(pk=file_id, storage_tier=File.TIER_HOT).first()
+    if file is None:
+        return None
+
+    mime_type, file_type, metadata = extract_metadata(file)
+    updates = {'metadata': metadata, 'metadata_extracted_at': timezone.now()}
+    # Unknown signatures keep whatever the client declared
+    if mime_type:
+        updates.update(mime_type=mime_type, file_type=file_type)
+    File.objects.filter(pk=file_id).update(**updates)
+    invalidate_file_lists([file_id])
+    return metadata
+
+
+def queue_metadata_extraction(file_id):
+    # The row is already committed; if the broker is down the beat sweep extracts it
+    try:
+        extract_file_metadata.delay(file_id)
+    except Exception:
+        logger.warning('Could not enqueue metadata extraction for file %s', file_id, exc_info=True)
+
+
+@shared_task
+def extract_pending_metadata(batch_size=None):
+    """Extract metadata for hot files whose upload-time task never ran."""
+    batch_size = batch_size or settings.STORAGE_METADATA_SWEEP_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(seconds=settings.STORAGE_METADATA_SWEEP_GRACE)
+    ids = list(
+        File.objects.filter(
+            metadata_extracted_at__isnull=True,
+            storage_tier=File.TIER_HOT,
+            created_at__lt=cutoff
+        ).order_by('created_at').values_list('pk', flat=True)[:batch_size]
+    )
+
+    extracted = 0
+    for file_id in ids:
+        try:
+            extract_file_metadata(file_id)
+            extracted += 1
+        except Exception:
+            logger.exception('Metadata extraction failed for file %s', file_id)
+            # Stamp the row so one unreadable file does not head every batch
+            File.objects.filter(pk=file_id).update(metadata_extracted_at=timezone.now())
+    return extracted
@@ -0,0 +1,133 @@
+import gzip
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File as DjangoFile
+from django.core.files.storage import storages
+from .models import File
+from .signals import invalidate_file_lists
+
+COLD_SUFFIX = '.gz'
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class TierLockTimeout(Exception):
+    """Raised when another worker holds the tier lock for too long."""
+
+
+def get_cold_storage():
+    return storages['cold']
+
+
+def get_cold_name(file):
+    return f"{file.file.name}{COLD_SUFFIX}"
+
+
+@contextmanager
+def tier_lock(file_id, wait=None):
+    """Hold a cross-process lock on a file's tier so only one worker moves it.
+
+    ``cache.add`` is atomic on Redis, so concurrent restores of the same
+    file queue up behind the first one instead of all decompressing it.
+    """
+    key = f"storage:tier-lock:{file_id}"
+    token = uuid.uuid4().hex
+    wait = settings.STORAGE_RESTORE_WAIT_TIMEOUT if wait is None else wait
+    deadline = time.monotonic() + wait
+
+    while not cache.add(key, token, settings.STORAGE_RESTORE_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            raise TierLockTimeout(f"File {file_id} is locked by another worker")
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def freeze(file):
+    """Move a hot file into the compressed cold store. Returns True if moved."""
+    hot_storage = file.file.storage
+    cold_storage = get_cold_storage()
+    cold_name = get_cold_name(file)
+
+    try:
+        with tier_lock(file.pk, wait=0):
+            last_accessed = file.last_accessed
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+                with hot_storage.open(file.file.name, 'rb') as source:
+                    with gzip.GzipFile(fileobj=buffer, mode='wb') as compressed:
+                        shutil.copyfileobj(source, compressed)
+                buffer.seek(0)
+                # Drop a stale copy left behind by an interrupted run
+                if cold_storage.exists(cold_name):
+                    cold_storage.delete(cold_name)
+                cold_name = cold_storage.save(cold_name, DjangoFile(buffer))
+
+            # Only flip the tier if nobody touched the file while we copied it
+            moved = File.objects.filter(
+                pk=file.pk,
+                storage_tier=File.TIER_HOT,
+                last_accessed=last_accessed
+            ).update(storage_tier=File.TIER_COLD)
+            if not moved:
+                cold_storage.delete(cold_name)
+                return False
+            hot_storage.delete(file.file.name)
+            invalidate_file_lists([file.pk])
+    except TierLockTimeout:
+        return False
+
+    file.storage_tier = File.TIER_COLD
+    return True
+
+
+def restore(file):
+    """Decompress a cold file back into the hot store; the caller holds its tier lock."""
+    hot_storage = file.file.storage
+    cold_storage = get_cold_storage()
+    cold_name = get_cold_name(file)
+    with cold_storage.open(cold_name, 'rb') as source:
+        with gzip.GzipFile(fileobj=source, mode='rb') as decompressed:
+            name = hot_storage.save(file.file.name, DjangoFile(decompressed))
+
+    file.file.name = name
+    file.storage_tier = File.TIER_HOT
+    File.objects.filter(pk=file.pk).update(file=name, storage_tier=File.TIER_HOT)
+    invalidate_file_lists([file.pk])
+    cold_storage.delete(cold_name)
+
+
+def ensure_hot(file):
+    """Transparently restore a cold file to the hot store before it is read."""
+    if file.storage_tier == File.TIER_HOT:
+        return
+
+    with tier_lock(file.pk):
+        # A concurrent request may have restored it while we waited
+        file.refresh_from_db(fields=['file', 'storage_tier'])
+        if file.storage_tier == File.TIER_HOT:
+            return
+        restore(file)
+
+
+def open_file(file):
+    """Open a file for reading, restoring it from the cold tier if needed."""
+    ensure_hot(file)
+    try:
+        return file.file.open('rb')
+    except FileNotFoundError:
+        pass
+
+    # Frozen since this row was loaded. Open under the lock so another
+    # freeze cannot move it again between the restore and the open.
+    with tier_lock(file.pk):
+        file.refresh_from_db(fields=['file', 'storage_tier'])
+        if file.storage_tier == File.TIER_COLD:
+            restore(file)
+        return file.file.open('rb')
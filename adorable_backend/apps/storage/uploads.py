@@ -0,0 +1,133 @@
+import hashlib
+import os
+import uuid
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from storages.utils import clean_name
+
+UPLOAD_SALT = 'storage.direct-upload'
+EVIDENCE_SALT = 'storage.direct-upload.evidence'
+
+PURPOSE_FILE = 'file'
+PURPOSE_EVIDENCE = 'evidence'
+
+
+class DirectUploadBackend:
+    """Issues presigned upload targets and inspects what clients uploaded."""
+
+    def presign(self, key, content_type, max_size, expires_in):
+        """Return ``{'url': ..., 'fields': {...}}`` for a browser-style POST."""
+        raise NotImplementedError
+
+    def stat(self, key):
+        """Return ``(size, md5_hex)`` for an uploaded object, or None if missing."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class S3DirectUploadBackend(DirectUploadBackend):
+    """Presigned POST against the S3-compatible bucket behind default storage."""
+
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+
+    @property
+    def client(self):
+        return self.storage.connection.meta.client
+
+    def get_object_key(self, key):
+        # Apply the storage's location prefix exactly as S3Storage.save would
+        return self.storage._normalize_name(clean_name(key))
+
+    def presign(self, key, content_type, max_size, expires_in):
+        return self.client.generate_presigned_post(
+            Bucket=self.storage.bucket_name,
+            Key=self.get_object_key(key),
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, max_size],
+            ],
+            ExpiresIn=expires_in,
+        )
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(
+                Bucket=self.storage.bucket_name,
+                Key=self.get_object_key(key)
+            )
+        except self.client.exceptions.ClientError:
+            return None
+        # Single-part uploads use the MD5 of the body as their ETag
+        return head['ContentLength'], head['ETag'].strip('"')
+
+    def delete(self, key):
+        self.storage.delete(key)
+
+
+class InMemoryDirectUploadBackend(DirectUploadBackend):
+    """Dictionary-backed stand-in for tests and local development."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def presign(self, key, content_type, max_size, expires_in):
+        return {'url': f"memory://{key}", 'fields': {'key': key, 'Content-Type': content_type}}
+
+    def put(self, key, data):
+        self.objects[key] = (len(data), hashlib.md5(data).hexdigest())
+
+    def stat(self, key):
+        return self.objects.get(key)
+
+    def delete(self, key):
+        self.objects.pop(key, None)
+
+
+_backend = None
+
+
+def get_direct_upload_backend():
+    """Return the configured backend, or None when direct uploads are disabled."""
+    global _backend
+    if _backend is None and settings.DIRECT_UPLOAD_BACKEND:
+        _backend = import_string(settings.DIRECT_UPLOAD_BACKEND)()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_direct_upload_backend(*, setting, **kwargs):
+    global _backend
+    if setting == 'DIRECT_UPLOAD_BACKEND':
+        _backend = None
+
+
+def build_upload_key(user, purpose, filename):
+    ext = os.path.splitext(filename)[1].lstrip('.').lower()
+    name = f"{uuid.uuid4()}.{ext}" if ext else str(uuid.uuid4())
+    if purpose == PURPOSE_EVIDENCE:
+        return f"reports/{name}"
+    return f"user_files/{user.id}/{name}"
+
+
+def sign_upload(payload):
+    return signing.dumps(payload, salt=UPLOAD_SALT)
+
+
+def load_upload(token):
+    return signing.loads(token, salt=UPLOAD_SALT, max_age=settings.DIRECT_UPLOAD_EXPIRY)
+
+
+def sign_evidence(user, key):
+    return signing.dumps({'user': user.pk, 'key': key}, salt=EVIDENCE_SALT)
+
+
+def load_evidence(token, max_age=None):
+    return signing.loads(token, salt=EVIDENCE_SALT, max_age=max_age)
@@ -5,7 +5,11 @@ from . import views
 router = DefaultRouter()
 router.register('files', views.FileViewSet, basename='file')
 router.register('shared', views.SharedFileViewSet, basename='shared-file')
+router.register('uploads', views.DirectUploadViewSet, basename='upload')
 
 urlpatterns = [
+    # Async endpoints, ahead of the router so they replace its actions
+    path('files/<int:pk>/download/', views.FileDownloadView.as_view(), name='file-download'),
+    path('uploads/complete/', views.DirectUploadCompleteView.as_view(), name='upload-complete'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -1,48 +1,328 @@
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status
+from django.conf import settings
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django_filters import rest_framework as filters
+from django import forms
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import F, Q
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.core.listcache import CachedListMixin
+from apps.core.transactions import NON_ATOMIC, TransactionPolicyMixin
+from apps.core.views import AsyncAPIView
+from apps.social.models import Block
 from .models import File, SharedFile
-from .serializers import FileSerializer, SharedFileSerializer
+from .archive import astream_zip, stream_zip
+from .tasks import queue_metadata_extraction
+from .tiering import TierLockTimeout, ensure_hot, open_file
+from .uploads import (
+    PURPOSE_EVIDENCE,
+    build_upload_key,
+    get_direct_upload_backend,
+    sign_evidence,
+    sign_upload,
+)
+from .signals import invalidate_file_lists, invalidate_share_lists
+from .serializers import (
+    FileSerializer,
+    SharedFileSerializer,
+    FileArchiveSerializer,
+    BulkShareSerializer,
+    DirectUploadSerializer,
+    DirectUploadCompleteSerializer,
+)
 
-class FileViewSet(viewsets.ModelViewSet):
+User = get_user_model()
+
+class IntegerFilter(filters.NumberFilter):
+    # JSON key lookups cannot serialize the Decimal a NumberFilter produces
+    field_class = forms.IntegerField
+
+class FileFilter(filters.FilterSet):
+    min_width = IntegerFilter(field_name='metadata__width', lookup_expr='gte')
+    min_height = IntegerFilter(field_name='metadata__height', lookup_expr='gte')
+    min_pages = IntegerFilter(field_name='metadata__pages', lookup_expr='gte')
+    has_exif = filters.BooleanFilter(method='filter_metadata')
+
+    def filter_metadata(self, queryset, name, value):
+        # Containment is what the PostgreSQL GIN index on metadata can serve
+        if connection.vendor == 'postgresql':
+            return queryset.filter(metadata__contains={name: value})
+        return queryset.filter(**{f'metadata__{name}': value})
+
+    class Meta:
+        model = File
+        fields = {
+            'file_type': ['exact'],
+            'is_public': ['exact'],
+            'mime_type': ['exact'],
+        }
+
+class FileViewSet(TransactionPolicyMixin, CachedListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = FileSerializer
+    list_cache_resource = 'files'
     permission_classes = [permissions.IsAuthenticated]
-    filterset_fields = ['file_type', 'is_public']
+    # The archive streams file contents and must not hold a transaction open
+    transaction_policy = {'archive': NON_ATOMIC}
+    filterset_class = FileFilter
     search_fields = ['title', 'description', 'original_name', 'tags']
     ordering_fields = ['created_at', 'updated_at', 'size', 'download_count']
     ordering = ['-created_at']
 
     def get_queryset(self):
         user = self.request.user
-        # Show user's own files and files shared with them
+        # Show user's own files and files shared with them by unexpired shares
         return File.objects.filter(
             Q(user=user) |
-            Q(shares__shared_with=user)
-        ).distinct()
+            Exists(SharedFile.objects.active().filter(file=OuterRef('pk'), shared_with=user))
+        )
 
-    @action(detail=True, methods=['post'])
-    def download(self, request, pk=None):
-        file = self.get_object()
-        file.download_count = F('download_count') + 1
-        file.last_accessed = timezone.now()
-        file.save()
-        
-        serializer = self.get_serializer(file)
-        return Response(serializer.data)
+    def list_cache_expires_at(self):
+        # A shared file leaves the list when its share expires
+        return SharedFile.objects.filter(shared_with=self.request.user).next_expiry()
+
+    def perform_create(self, serializer):
+        file = serializer.save()
+        transaction.on_commit(lambda: queue_metadata_extraction(file.pk))
 
-class SharedFileViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def archive(self, request):
+        """Stream the requested accessible files as a single ZIP archive."""
+        serializer = FileArchiveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['files']
+
+        position = {pk: index for index, pk in enumerate(ids)}
+        files = sorted(
+            self.get_queryset().filter(pk__in=ids),
+            key=lambda file: position[file.pk]
+        )
+        if not files:
+            return Response({'detail': 'No accessible files'}, status=status.HTTP_404_NOT_FOUND)
+
+        File.objects.filter(pk__in=[file.pk for file in files]).update(
+            download_count=F('download_count') + 1,
+            last_accessed=timezone.now()
+        )
+        invalidate_file_lists([file.pk for file in files])
+
+        # Each server type needs its own kind of iterator to stream without buffering
+        if isinstance(request._request, ASGIRequest):
+            content = astream_zip(files, open_file=open_file)
+        else:
+            content = stream_zip(files, open_file=open_file)
+        response = StreamingHttpResponse(content, content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="files.zip"'
+        return response
+
+class SharedFileViewSet(TransactionPolicyMixin, CachedListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = SharedFileSerializer
+    list_cache_resource = 'shared'
     permission_classes = [permissions.IsAuthenticated]
+    # bulk opens its own transaction around the insert only
+    transaction_policy = {'bulk': NON_ATOMIC}
     filterset_fields = ['permission']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
 
     def get_queryset(self):
         user = self.request.user
+        # Recipients lose sight of a share as soon as it expires
         return SharedFile.objects.filter(
             Q(shared_by=user) |
             Q(shared_with=user)
+        ).exclude(
+            shared_with=user,
+            expires_at__lte=timezone.now()
         ).select_related('file')
- 
\ No newline at end of file
+
+    def list_cache_expires_at(self):
+        return SharedFile.objects.filter(shared_with=self.request.user).next_expiry()
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Share many files with many users in a constant number of queries."""
+        serializer = BulkShareSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        user = request.user
+
+        with transaction.atomic():
+            # Files the user owns or was granted reshare rights on, with owners
+            owners = dict(
+                File.objects.filter(pk__in=data['files'])
+                .filter(
+                    Q(user=user) |
+                    Exists(SharedFile.objects.active().filter(
+                        file=OuterRef('pk'), shared_with=user, can_reshare=True
+                    ))
+                )
+                .values_list('pk', 'user_id')
+            )
+            # Active recipients with no block in either direction
+            recipients = list(
+                User.objects.filter(pk__in=data['shared_with'], is_active=True)
+                .exclude(pk=user.pk)
+                .exclude(Exists(Block.objects.filter(
+                    Q(blocker=user, blocked=OuterRef('pk')) |
+                    Q(blocker=OuterRef('pk'), blocked=user)
+                )))
+                .values_list('pk', flat=True)
+            )
+            # Pairs already shared are skipped so the count reflects new rows
+            existing = set(
+                SharedFile.objects.filter(file_id__in=owners, shared_with_id__in=recipients)
+                .values_list('file_id', 'shared_with_id')
+            )
+            shares = [
+                SharedFile(
+                    file_id=file_id,
+                    shared_by=user,
+                    shared_with_id=recipient_id,
+                    permission=data['permission'],
+                    can_reshare=data['can_reshare'],
+                    expires_at=data.get('expires_at'),
+                )
+                for file_id, owner_id in owners.items()
+                for recipient_id in recipients
+                if recipient_id != owner_id and (file_id, recipient_id) not in existing
+            ]
+            SharedFile.objects.bulk_create(shares, ignore_conflicts=True)
+            # bulk_create sends no post_save
+            invalidate_share_lists(user.pk, recipients)
+
+        recipient_ids = set(recipients)
+
+        return Response({
+            'files': [pk for pk in data['files'] if pk in owners],
+            'shared_with': recipients,
+            'skipped_files': [pk for pk in data['files'] if pk not in owners],
+            'skipped_users': [pk for pk in data['shared_with'] if pk not in recipient_ids],
+            'shares': len(shares),
+        }, status=status.HTTP_201_CREATED)
+
+class DirectUploadViewSet(TransactionPolicyMixin, viewsets.ViewSet):
+    """Presigned uploads that go straight to object storage."""
+    permission_classes = [permissions.IsAuthenticated]
+    # Presigning only signs a URL; nothing is written to the database
+    transaction_policy = {'create': NON_ATOMIC}
+    throttle_scope = 'uploads'
+
+    def not_configured(self):
+        return Response(
+            {'detail': 'Direct uploads are not configured'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    def create(self, request):
+        backend = get_direct_upload_backend()
+        if backend is None:
+            return self.not_configured()
+        serializer = DirectUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        key = build_upload_key(request.user, data['purpose'], data['original_name'])
+        target = backend.presign(
+            key, data['content_type'], data['size'], settings.DIRECT_UPLOAD_EXPIRY
+        )
+        upload = sign_upload({**data, 'user': request.user.pk, 'key': key})
+
+        return Response({
+            'upload': upload,
+            'key': key,
+            'url': target['url'],
+            'fields': target['fields'],
+            'expires_in': settings.DIRECT_UPLOAD_EXPIRY,
+        }, status=status.HTTP_201_CREATED)
+
+class FileDownloadView(AsyncAPIView):
+    """Record a download of an accessible file, restoring it from cold storage first."""
+
+    async def post(self, request, pk):
+        user = request.user
+        file = await File.objects.filter(
+            Q(user=user) |
+            Exists(SharedFile.objects.active().filter(file=OuterRef('pk'), shared_with=user))
+        ).filter(pk=pk).afirst()
+        if file is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            # Restores move whole objects between storages and update the row
+            await sync_to_async(ensure_hot)(file)
+        except TierLockTimeout:
+            return Response(
+                {'detail': 'File is being restored, try again shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        file.download_count = F('download_count') + 1
+        file.last_accessed = timezone.now()
+        await file.asave(update_fields=['download_count', 'last_accessed'])
+        await file.arefresh_from_db(fields=['download_count'])
+
+        serializer = FileSerializer(file, context={'request': request})
+        return Response(serializer.data)
+
+class DirectUploadCompleteView(AsyncAPIView):
+    """Verify a direct upload against object storage and register it."""
+    throttle_scope = 'uploads'
+
+    async def post(self, request):
+        backend = get_direct_upload_backend()
+        if backend is None:
+            return Response(
+                {'detail': 'Direct uploads are not configured'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        serializer = DirectUploadCompleteSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        upload = serializer.validated_data['upload']
+        key = upload['key']
+
+        # Object storage calls never touch the database, so they need no thread affinity
+        stat = await sync_to_async(backend.stat, thread_sensitive=False)(key)
+        if stat is None:
+            return Response({'detail': 'Upload not found'}, status=status.HTTP_400_BAD_REQUEST)
+        size, md5 = stat
+        if size != upload['size'] or md5.lower() != upload['md5']:
+            await sync_to_async(backend.delete, thread_sensitive=False)(key)
+            return Response(
+                {'detail': 'Uploaded object does not match the declared size and checksum'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if upload['purpose'] == PURPOSE_EVIDENCE:
+            return Response(
+                {'evidence_upload': sign_evidence(request.user, key)},
+                status=status.HTTP_201_CREATED
+            )
+
+        # Completing the same upload twice returns the existing row
+        file, created = await File.objects.aget_or_create(
+            user=request.user,
+            file=key,
+            defaults={
+                'file_type': upload['file_type'],
+                'original_name': upload['original_name'],
+                'size': size,
+                'mime_type': upload['content_type'],
+                'title': upload['title'],
+                'description': upload['description'],
+                'tags': upload['tags'],
+                'is_public': upload['is_public'],
+            }
+        )
+        if created:
+            # Enqueued once the row is committed, as for multipart uploads
+            await sync_to_async(transaction.on_commit)(lambda: queue_metadata_extraction(file.pk))
+        serializer = FileSerializer(file, context={'request': request})
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
@@ -0,0 +1,155 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class LocalUserCache:
+    """Small thread-safe LRU with a per-entry TTL, private to this process."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Other processes only learn about invalidations through the shared cache,
+# so the local TTL bounds how long they may serve a stale user.
+local_user_cache = LocalUserCache(
+    maxsize=settings.AUTH_USER_CACHE_LOCAL_SIZE,
+    ttl=settings.AUTH_USER_CACHE_LOCAL_TTL
+)
+
+
+def user_cache_key(user_id):
+    # Token claims may carry the id as a string, model instances as an int
+    return f"auth:user:{user_id}"
+
+
+def get_cached_user(user_id):
+    key = user_cache_key(user_id)
+    user = local_user_cache.get(key)
+    if user is None:
+        user = cache.get(key)
+        if user is None:
+            return None
+        local_user_cache.set(key, user)
+    # Hand out a copy so request code can never mutate the shared instance
+    return copy.copy(user)
+
+
+def cache_user(user):
+    key = user_cache_key(getattr(user, api_settings.USER_ID_FIELD))
+    cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+    local_user_cache.set(key, copy.copy(user))
+    return user
+
+
+async def aget_cached_user(user_id):
+    key = user_cache_key(user_id)
+    user = local_user_cache.get(key)
+    if user is None:
+        user = await cache.aget(key)
+        if user is None:
+            return None
+        local_user_cache.set(key, user)
+    return copy.copy(user)
+
+
+async def acache_user(user):
+    key = user_cache_key(getattr(user, api_settings.USER_ID_FIELD))
+    await cache.aset(key, user, settings.AUTH_USER_CACHE_TTL)
+    local_user_cache.set(key, copy.copy(user))
+    return user
+
+
+def invalidate_cached_user(user_id):
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    local_user_cache.delete(key)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that resolves users from a two-level cache.
+
+    Hits are served from the in-process LRU or Redis without touching the
+    database; misses fall back to the regular lookup and populate both.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            return cache_user(super().get_user(validated_token))
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views; misses use the async ORM."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = await aget_cached_user(user_id)
+        if user is None:
+            user = await self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).afirst()
+            if user is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            await acache_user(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
@@ -0,0 +1,71 @@
+import inspect
+from asgiref.sync import sync_to_async
+from django.contrib.auth import _clean_credentials, _get_backends, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+from .hashers import acheck_password, amake_password
+
+UserModel = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """Sign in with email and password instead of the username."""
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        user = UserModel._default_manager.filter(email=email).first()
+        if user is None:
+            # Hash anyway so unknown emails cost as much as wrong passwords
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, email=None, password=None, **kwargs):
+        """``authenticate`` with the password hashed on the bounded pool.
+
+        Raises ``HashingPoolFull`` when the pool is saturated.
+        """
+        if email is None or password is None:
+            return None
+        user = await UserModel._default_manager.filter(email=email).afirst()
+        if user is None:
+            await amake_password(password)
+            return None
+        if await acheck_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+async def aauthenticate(request=None, **credentials):
+    """``django.contrib.auth.authenticate`` for async views.
+
+    Backends with an ``aauthenticate`` method run on the event loop; any
+    other backend runs in a worker thread. Signals match ``authenticate``.
+    """
+    for backend, backend_path in _get_backends(return_tuples=True):
+        method = getattr(backend, 'aauthenticate', None)
+        try:
+            inspect.signature(backend.authenticate).bind(request, **credentials)
+        except TypeError:
+            # This backend doesn't accept these credentials
+            continue
+        try:
+            if method is not None:
+                user = await method(request, **credentials)
+            else:
+                user = await sync_to_async(backend.authenticate)(request, **credentials)
+        except PermissionDenied:
+            break
+        if user is None:
+            continue
+        user.backend = backend_path
+        return user
+
+    await sync_to_async(user_login_failed.send)(
+        sender=__name__, credentials=_clean_credentials(credentials), request=request
+    )
+    return None
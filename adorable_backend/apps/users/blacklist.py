@@ -0,0 +1,72 @@
+import threading
+import time
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class TokenBlacklist:
+    """Store of revoked token JTIs; entries vanish once the token expires."""
+
+    def add(self, jti, expires_at):
+        """Blacklist ``jti`` until the unix timestamp ``expires_at``."""
+        raise NotImplementedError
+
+    def contains(self, jti):
+        raise NotImplementedError
+
+
+class RedisTokenBlacklist(TokenBlacklist):
+    """One ``SET ... EX`` per revocation and one ``EXISTS`` per check."""
+
+    key_prefix = 'jwt:blacklist:'
+
+    def __init__(self, alias=None):
+        from django_redis import get_redis_connection
+        self.client = get_redis_connection(alias or settings.TOKEN_BLACKLIST_CACHE)
+
+    def add(self, jti, expires_at):
+        ttl = int(expires_at - time.time())
+        if ttl > 0:
+            self.client.set(f"{self.key_prefix}{jti}", 1, ex=ttl)
+
+    def contains(self, jti):
+        return bool(self.client.exists(f"{self.key_prefix}{jti}"))
+
+
+class InMemoryTokenBlacklist(TokenBlacklist):
+    """Process-local implementation for tests and single-process development."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            self._entries = {key: exp for key, exp in self._entries.items() if exp > now}
+            if expires_at > now:
+                self._entries[jti] = expires_at
+
+    def contains(self, jti):
+        with self._lock:
+            expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+
+_blacklist = None
+
+
+def get_token_blacklist():
+    global _blacklist
+    if _blacklist is None:
+        _blacklist = import_string(settings.TOKEN_BLACKLIST_BACKEND)()
+    return _blacklist
+
+
+@receiver(setting_changed)
+def reset_token_blacklist(*, setting, **kwargs):
+    global _blacklist
+    if setting == 'TOKEN_BLACKLIST_BACKEND':
+        _blacklist = None
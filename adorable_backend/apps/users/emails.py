@@ -0,0 +1,39 @@
+import logging
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(to, subject, body, html_body=''):
+    """Write an email to the outbox; it is handed to the worker once the transaction commits."""
+    from .tasks import send_outbox_emails
+
+    email = OutboxEmail.objects.create(to=to, subject=subject, body=body, html_body=html_body)
+    transaction.on_commit(lambda: wake_outbox_worker(send_outbox_emails))
+    return email
+
+
+def wake_outbox_worker(task):
+    # The row is already committed; if the broker is down the beat sweep sends it
+    try:
+        task.delay()
+    except Exception:
+        logger.warning('Could not enqueue outbox worker', exc_info=True)
+
+
+def send_password_reset_email(user):
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    link = settings.PASSWORD_RESET_URL.format(uid=uid, token=token)
+    return queue_email(
+        user.email,
+        'Reset your Adorable password',
+        f"Hi {user.get_short_name()},\n\n"
+        f"Use the link below to choose a new password:\n{link}\n\n"
+        "If you did not ask for this, you can ignore this email."
+    )
@@ -0,0 +1,66 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, check_password, make_password
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 with cost parameters taken from settings.
+
+    Raising the costs makes ``must_update`` true for existing hashes, so
+    they are re-hashed with the new parameters on the next login.
+    """
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class HashingPoolFull(Exception):
+    """Raised when every hashing slot is taken and the request should back off."""
+
+
+# PBKDF2 and Argon2 release the GIL, so a small pool hashes in parallel
+# while the event loop keeps serving other requests.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    thread_name_prefix='password-hashing'
+)
+_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASHING_WORKERS + settings.PASSWORD_HASHING_QUEUE_SIZE
+)
+
+
+async def run_in_hashing_pool(func, *args):
+    """Run ``func`` on the bounded hashing pool or fail fast when it is saturated."""
+    if not _slots.acquire(blocking=False):
+        raise HashingPoolFull()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args))
+    finally:
+        _slots.release()
+
+
+def _check_and_upgrade(raw_password, encoded):
+    upgraded = []
+    valid = check_password(
+        raw_password,
+        encoded,
+        setter=lambda raw: upgraded.append(make_password(raw))
+    )
+    return valid, upgraded[0] if upgraded else None
+
+
+async def acheck_password(user, raw_password):
+    """Verify a password off the event loop, upgrading outdated hashes in place."""
+    valid, new_hash = await run_in_hashing_pool(_check_and_upgrade, raw_password, user.password)
+    if new_hash:
+        user.password = new_hash
+        await user.asave(update_fields=['password'])
+    return valid
+
+
+async def amake_password(raw_password):
+    return await run_in_hashing_pool(make_password, raw_password)
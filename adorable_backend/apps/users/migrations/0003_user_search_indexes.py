@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Expression indexes matching the SQL Django emits for istartswith/icontains
+SEARCH_INDEXES = [
+    ('users_user_username_prefix', 'UPPER(username::text) text_pattern_ops', 'btree'),
+    ('users_user_first_name_prefix', 'UPPER(first_name::text) text_pattern_ops', 'btree'),
+    ('users_user_last_name_prefix', 'UPPER(last_name::text) text_pattern_ops', 'btree'),
+    ('users_user_email_prefix', 'UPPER(email::text) text_pattern_ops', 'btree'),
+    ('users_user_username_trgm', 'UPPER(username::text) gin_trgm_ops', 'gin'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    # Prefix and trigram indexes are only available on PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression, method in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON users_user USING {method} ({expression})'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(condition=models.Q(('status', 'sent')), fields=['sent_at'], name='users_outbox_sent_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -42,4 +43,55 @@ class User(AbstractUser):
     
     def get_short_name(self):
         """Return the short name of the user."""
-        return self.first_name if self.first_name else self.username 
\ No newline at end of file
+        return self.first_name if self.first_name else self.username
+
+
+class OutboxEmail(models.Model):
+    """Transactional email written in the request transaction and sent by a worker."""
+    
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_SENDING, _('Sending')),
+        (STATUS_SENT, _('Sent')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+    
+    to = models.EmailField(_('to'))
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    html_body = models.TextField(_('HTML body'), blank=True)
+    
+    status = models.CharField(_('status'), max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    last_error = models.TextField(_('last error'), blank=True)
+    next_attempt_at = models.DateTimeField(_('next attempt at'), default=timezone.now)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('outbox email')
+        verbose_name_plural = _('outbox emails')
+        ordering = ['next_attempt_at']
+        indexes = [
+            # The worker only ever scans messages that still need delivery
+            models.Index(
+                fields=['next_attempt_at'],
+                name='users_outbox_due_idx',
+                condition=models.Q(status__in=['pending', 'sending'])
+            ),
+            # Sent messages are only read again when they are pruned
+            models.Index(
+                fields=['sent_at'],
+                name='users_outbox_sent_idx',
+                condition=models.Q(status='sent')
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} to {self.to} ({self.status})"
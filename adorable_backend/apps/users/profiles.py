@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+def profile_cache_key(user_id):
+    return f"profile:{user_id}"
+
+
+def profile_etag(user):
+    # updated_at is bumped by every save, so it versions the whole profile
+    return f'"{user.pk}-{user.updated_at.timestamp():.6f}"'
+
+
+def get_cached_profile(user, serializer_class, context=None):
+    """Return serialized profile data, reusing the cached copy while it is current."""
+    key = profile_cache_key(user.pk)
+    etag = profile_etag(user)
+    cached = cache.get(key)
+    if cached is not None and cached['etag'] == etag:
+        return cached['data']
+
+    data = serializer_class(user, context=context).data
+    cache.set(key, {'etag': etag, 'data': data}, settings.PROFILE_CACHE_TTL)
+    return data
+
+
+def invalidate_cached_profile(user_id):
+    cache.delete(profile_cache_key(user_id))
@@ -0,0 +1,24 @@
+from django.db.models import Exists, OuterRef
+from apps.social.models import Block, Follow
+
+
+def annotate_relationships(queryset, viewer):
+    """Annotate users with how they relate to ``viewer`` using correlated subqueries.
+
+    Each flag is an ``EXISTS`` against the unique (follower, followed) and
+    (blocker, blocked) indexes, so the whole page is still one query.
+    """
+    return queryset.annotate(
+        is_following=Exists(Follow.objects.filter(follower=viewer, followed=OuterRef('pk'))),
+        is_followed_by=Exists(Follow.objects.filter(follower=OuterRef('pk'), followed=viewer)),
+        is_blocked=Exists(Block.objects.filter(blocker=viewer, blocked=OuterRef('pk'))),
+    )
+
+
+def exclude_blocked(queryset, viewer):
+    """Drop users the viewer blocked or who blocked the viewer."""
+    return queryset.exclude(
+        Exists(Block.objects.filter(blocker=viewer, blocked=OuterRef('pk')))
+    ).exclude(
+        Exists(Block.objects.filter(blocker=OuterRef('pk'), blocked=viewer))
+    )
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from .relationships import annotate_relationships, exclude_blocked
+
+User = get_user_model()
+
+# Substring matches need the pg_trgm index; shorter terms stay prefix-only
+TRIGRAM_MIN_LENGTH = 3
+
+
+def build_match(query):
+    """Translate a typeahead query into index-friendly prefix lookups.
+
+    ``istartswith`` compiles to ``UPPER(col) LIKE 'Q%'`` which the
+    ``text_pattern_ops`` expression indexes from migration 0003 serve.
+    """
+    if '@' in query:
+        # Only complete the email once the user has typed up to the @
+        return Q(email__istartswith=query)
+
+    terms = query.split()
+    if len(terms) > 1:
+        return Q(first_name__istartswith=terms[0], last_name__istartswith=' '.join(terms[1:]))
+
+    match = (
+        Q(username__istartswith=query) |
+        Q(first_name__istartswith=query) |
+        Q(last_name__istartswith=query)
+    )
+    if connection.vendor == 'postgresql' and len(query) >= TRIGRAM_MIN_LENGTH:
+        match |= Q(username__icontains=query)
+    return match
+
+
+def search_users(query, viewer, limit):
+    """Active users matching ``query``, most-followed first, hiding blocks both ways."""
+    users = User.objects.filter(build_match(query.strip()), is_active=True).exclude(pk=viewer.pk)
+    users = annotate_relationships(exclude_blocked(users, viewer), viewer)
+    return users.only(
+        'id', 'username', 'first_name', 'last_name', 'avatar', 'is_verified',
+        'followers_count', 'following_count'
+    ).order_by('-followers_count', 'pk')[:limit]
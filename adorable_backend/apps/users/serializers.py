@@ -1,78 +1,132 @@
+import re
+import secrets
 from rest_framework import serializers
-from django.contrib.auth import get_user_model, authenticate
-from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from .emails import send_password_reset_email
+from .tokens import BlacklistRefreshToken
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
+    display_name = serializers.CharField(source='get_full_name', read_only=True)
+
     class Meta:
         model = User
-        fields = ['id', 'email', 'display_name', 'photo_url', 'is_email_verified']
-        read_only_fields = ['id', 'email', 'is_email_verified']
+        fields = [
+            'id', 'email', 'username', 'first_name', 'last_name', 'display_name',
+            'avatar', 'bio', 'phone_number', 'date_of_birth', 'is_verified',
+            'language', 'timezone', 'followers_count', 'following_count', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'email', 'is_verified', 'followers_count', 'following_count', 'updated_at'
+        ]
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
     def validate(self, attrs):
-        email = attrs.get('email')
-        password = attrs.get('password')
-
-        if email and password:
-            user = authenticate(email=email, password=password)
-            if not user:
-                msg = _('Unable to log in with provided credentials.')
-                raise serializers.ValidationError(msg, code='authorization')
-        else:
+        # Credentials are checked by LoginView through the authentication backends
+        if not (attrs.get('email') and attrs.get('password')):
             msg = _('Must include "email" and "password".')
             raise serializers.ValidationError(msg, code='authorization')
-
-        attrs['user'] = user
         return attrs
 
+def available_username(email):
+    """Derive an unused username from the local part of an email address."""
+    base = re.sub(r'[^\w.@+-]', '', email.split('@')[0])[:140] or 'user'
+    username = base
+    while User.objects.filter(username=username).exists():
+        username = f"{base}{secrets.randbelow(10 ** 6)}"
+    return username
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     confirm_password = serializers.CharField(write_only=True)
 
     class Meta:
         model = User
-        fields = ['email', 'display_name', 'password', 'confirm_password', 'photo_url']
+        fields = ['email', 'username', 'first_name', 'last_name', 'password', 'confirm_password']
         extra_kwargs = {
-            'photo_url': {'required': False},
+            # Derived from the email address when left out
+            'username': {'required': False},
         }
 
     def validate(self, attrs):
         if attrs['password'] != attrs.pop('confirm_password'):
             raise serializers.ValidationError({'password': 'Passwords do not match.'})
+        if not attrs.get('username'):
+            attrs['username'] = available_username(attrs['email'])
         return attrs
 
     def create(self, validated_data):
         return User.objects.create_user(**validated_data)
 
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact profile annotated with the requesting user's relationships."""
+    display_name = serializers.CharField(source='get_full_name', read_only=True)
+    is_following = serializers.BooleanField(read_only=True)
+    is_followed_by = serializers.BooleanField(read_only=True)
+    is_blocked = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'display_name', 'avatar', 'is_verified',
+            'followers_count', 'following_count',
+            'is_following', 'is_followed_by', 'is_blocked'
+        ]
+        read_only_fields = fields
+
+class UserBatchSerializer(serializers.Serializer):
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError('Expected a comma-separated list of user ids.')
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError('At least one user id is required.')
+        if len(ids) > settings.USER_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"At most {settings.USER_BATCH_MAX_SIZE} users can be looked up at once."
+            )
+        return ids
+
+class UserSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=150, trim_whitespace=True)
+
+    def validate_q(self, value):
+        if len(value) < settings.USER_SEARCH_MIN_LENGTH:
+            raise serializers.ValidationError(
+                f"Enter at least {settings.USER_SEARCH_MIN_LENGTH} characters."
+            )
+        return value
+
 class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
     def validate_email(self, value):
-        try:
-            user = User.objects.get(email=value)
-        except User.DoesNotExist:
+        if not User.objects.filter(email=value).exists():
             raise serializers.ValidationError('No user found with this email address.')
         return value
 
     def save(self):
         email = self.validated_data['email']
         user = User.objects.get(email=email)
-        # Send password reset email
-        user.send_password_reset_email()
+        # Queued in the request transaction and delivered by the outbox worker
+        send_password_reset_email(user)
 
 class EmailVerificationSerializer(serializers.Serializer):
     token = serializers.CharField()
 
     def validate_token(self, value):
-        try:
-            user = User.objects.get(email_verification_token=value)
-        except User.DoesNotExist:
+        if not User.objects.filter(email_verification_token=value).exists():
             raise serializers.ValidationError('Invalid verification token.')
         return value
 
@@ -81,4 +135,8 @@ class EmailVerificationSerializer(serializers.Serializer):
         user = User.objects.get(email_verification_token=token)
         user.is_email_verified = True
         user.email_verification_token = None
-        user.save() 
\ No newline at end of file
+        user.save()
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # Rotation blacklists the old token in the TTL store
+    token_class = BlacklistRefreshToken
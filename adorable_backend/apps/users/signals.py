@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import invalidate_cached_user
+from .profiles import invalidate_cached_profile
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Drop cached auth users and profiles on any save, including password and is_active changes."""
+    user_id = instance.pk
+
+    def invalidate():
+        invalidate_cached_user(user_id)
+        invalidate_cached_profile(user_id)
+
+    # Dropping before commit would let a concurrent miss re-cache the old row
+    transaction.on_commit(invalidate)
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import OutboxEmail
+
+
+def claim_outbox_batch(batch_size):
+    """Lease a batch of due emails so concurrent workers never send the same one."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[OutboxEmail.STATUS_PENDING, OutboxEmail.STATUS_SENDING],
+                next_attempt_at__lte=now
+            )
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        # Leases that ran out after the last attempt mean a worker kept crashing on it
+        exhausted = [email.pk for email in due if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS]
+        OutboxEmail.objects.filter(pk__in=exhausted).update(
+            status=OutboxEmail.STATUS_FAILED,
+            last_error='Lease expired after the last attempt'
+        )
+        emails = [email for email in due if email.pk not in exhausted]
+        # Attempts are counted when leased, so a crash mid-send still uses one up;
+        # a crashed worker's lease runs out and the email becomes due again
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status=OutboxEmail.STATUS_SENDING,
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        settings.DEFAULT_FROM_EMAIL,
+        [email.to],
+        connection=connection
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def record_failure(email, error):
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.STATUS_FAILED
+    else:
+        email.status = OutboxEmail.STATUS_PENDING
+        delay = min(
+            settings.EMAIL_OUTBOX_RETRY_BASE * 2 ** (email.attempts - 1),
+            settings.EMAIL_OUTBOX_RETRY_MAX
+        )
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    email.save(update_fields=['last_error', 'status', 'next_attempt_at'])
+
+
+@shared_task
+def send_outbox_emails(batch_size=None, max_batches=None):
+    """Drain due outbox emails, reusing one SMTP connection per batch."""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    max_batches = max_batches or settings.EMAIL_OUTBOX_MAX_BATCHES
+    sent = 0
+
+    for _ in range(max_batches):
+        emails = claim_outbox_batch(batch_size)
+        if not emails:
+            break
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as exc:
+            for email in emails:
+                record_failure(email, exc)
+            break
+
+        try:
+            for email in emails:
+                try:
+                    build_message(email, connection).send()
+                except Exception as exc:
+                    record_failure(email, exc)
+                    continue
+                OutboxEmail.objects.filter(pk=email.pk).update(
+                    status=OutboxEmail.STATUS_SENT,
+                    sent_at=timezone.now(),
+                    last_error=''
+                )
+                sent += 1
+        finally:
+            connection.close()
+
+        if len(emails) < batch_size:
+            break
+
+    return sent
+
+
+@shared_task
+def prune_sent_emails(days=None, batch_size=None):
+    """Delete emails sent more than ``days`` days ago, one short transaction per batch."""
+    days = days or settings.EMAIL_OUTBOX_RETENTION_DAYS
+    batch_size = batch_size or settings.EMAIL_OUTBOX_PRUNE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+
+    while True:
+        ids = list(
+            OutboxEmail.objects.filter(status=OutboxEmail.STATUS_SENT, sent_at__lt=cutoff)
+            .order_by('sent_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            count, _ = OutboxEmail.objects.filter(pk__in=ids).delete()
+        deleted += count
+        if len(ids) < batch_size:
+            break
+
+    return deleted
@@ -0,0 +1,25 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .blacklist import get_token_blacklist
+
+
+class BlacklistRefreshToken(RefreshToken):
+    """Refresh token checked against the TTL blacklist instead of database tables."""
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if get_token_blacklist().contains(self[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        get_token_blacklist().add(self[api_settings.JTI_CLAIM], self['exp'])
+
+
+def revoke_refresh_token(raw_token):
+    """Verify a refresh token and blacklist it; raises ``TokenError`` if invalid."""
+    BlacklistRefreshToken(raw_token).blacklist()
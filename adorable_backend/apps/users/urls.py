@@ -1,5 +1,4 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     LoginView,
     RegisterView,
@@ -7,6 +6,9 @@ from .views import (
     ProfileView,
     PasswordResetView,
     EmailVerificationView,
+    TokenRefreshView,
+    UserBatchView,
+    UserSearchView,
 )
 
 app_name = 'users'
@@ -19,4 +21,6 @@ urlpatterns = [
     path('auth/profile/', ProfileView.as_view(), name='profile'),
     path('auth/reset-password/', PasswordResetView.as_view(), name='reset_password'),
     path('auth/verify-email/', EmailVerificationView.as_view(), name='verify_email'),
+    path('batch/', UserBatchView.as_view(), name='user_batch'),
+    path('search/', UserSearchView.as_view(), name='user_search'),
 ] 
\ No newline at end of file
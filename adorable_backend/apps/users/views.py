@@ -2,72 +2,204 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.translation import gettext as _
+from django.views.decorators.http import condition
+from apps.core.middleware import pin_to_primary
+from apps.core.transactions import NON_ATOMIC, TransactionPolicyMixin
+from apps.core.views import AsyncAPIView
+from .backends import aauthenticate
+from .hashers import HashingPoolFull, amake_password
 from .serializers import (
     UserSerializer,
     LoginSerializer,
     RegisterSerializer,
     PasswordResetSerializer,
     EmailVerificationSerializer,
+    TokenRefreshSerializer,
+    UserSummarySerializer,
+    UserBatchSerializer,
+    UserSearchSerializer,
 )
+from .profiles import get_cached_profile, profile_etag
+from .relationships import annotate_relationships
+from .search import search_users
+from .tokens import BlacklistRefreshToken, revoke_refresh_token
 
 User = get_user_model()
 
-class LoginView(APIView):
-    permission_classes = [AllowAny]
+def token_payload(user):
+    refresh = BlacklistRefreshToken.for_user(user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'user': UserSerializer(user).data
+    }
+
+
+def hashing_busy_response():
+    response = Response(
+        {'detail': 'Too many sign-ins in progress, please retry shortly.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+class LoginView(AsyncAPIView):
+    """Async login through the authentication backends.
+
+    ``EmailBackend`` checks the password on the bounded hashing pool;
+    other backends run in a worker thread.
+    """
+    # Credentials come in the body; a stale Bearer header must not block signing in
+    authentication_class = None
+    authentication_required = False
     serializer_class = LoginSerializer
+    throttle_scope = 'login'
 
-    def post(self, request):
+    async def post(self, request):
         serializer = self.serializer_class(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user = await aauthenticate(
+                request._request,
+                email=serializer.validated_data['email'],
+                password=serializer.validated_data['password']
+            )
+        except HashingPoolFull:
+            return hashing_busy_response()
+        if user is None:
+            return Response(
+                {'non_field_errors': [_('Unable to log in with provided credentials.')]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Login may have rewritten the password hash; the new token's reads must see it
+        pin_to_primary(request, user.pk)
+        return Response(token_payload(user))
 
-        return Response({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
-            'user': UserSerializer(user).data
-        })
 
-class RegisterView(APIView):
-    permission_classes = [AllowAny]
+class RegisterView(AsyncAPIView):
+    """Async registration; the new password is hashed on the bounded hashing pool."""
+    authentication_class = None
+    authentication_required = False
     serializer_class = RegisterSerializer
+    throttle_scope = 'register'
 
-    def post(self, request):
+    async def post(self, request):
         serializer = self.serializer_class(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        # Uniqueness validators query the database
+        if not await sync_to_async(serializer.is_valid)():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
-            'user': UserSerializer(user).data
-        }, status=status.HTTP_201_CREATED)
+        validated_data = dict(serializer.validated_data)
+        try:
+            password = await amake_password(validated_data.pop('password'))
+        except HashingPoolFull:
+            return hashing_busy_response()
 
-class LogoutView(APIView):
-    permission_classes = [IsAuthenticated]
+        user = User(**validated_data)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = password
+        try:
+            await user.asave()
+        except IntegrityError:
+            # Lost a race with a concurrent registration for the same email or username
+            return Response(
+                {'detail': 'A user with that email or username already exists.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        pin_to_primary(request, user.pk)
+        return Response(token_payload(user), status=status.HTTP_201_CREATED)
 
-    def post(self, request):
+class LogoutView(AsyncAPIView):
+    """Async logout; revocation only talks to the Redis blacklist."""
+
+    async def post(self, request):
         try:
-            refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
-            token.blacklist()
-            return Response(status=status.HTTP_205_RESET_CONTENT)
+            await sync_to_async(revoke_refresh_token, thread_sensitive=False)(request.data['refresh'])
         except Exception:
             return Response(status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_205_RESET_CONTENT)
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+class TokenRefreshView(TransactionPolicyMixin, BaseTokenRefreshView):
+    serializer_class = TokenRefreshSerializer
+    # Rotation only signs tokens and writes to the Redis blacklist
+    transaction_policy = {'post': NON_ATOMIC}
+
+def profile_view_etag(request, *args, **kwargs):
+    return profile_etag(request.user)
+
+
+def profile_view_last_modified(request, *args, **kwargs):
+    return request.user.updated_at
+
+
+class ProfileView(TransactionPolicyMixin, generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the auth cache; writes start from the locked current row
+        return User.objects.select_for_update().get(pk=self.request.user.pk)
+
+    @method_decorator(condition(etag_func=profile_view_etag, last_modified_func=profile_view_last_modified))
+    def get(self, request, *args, **kwargs):
+        # Unchanged profiles are answered with a 304 before any serialization
+        response = Response(
+            get_cached_profile(request.user, self.serializer_class, self.get_serializer_context())
+        )
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+class UserBatchView(TransactionPolicyMixin, APIView):
+    """Compact profiles for up to ``USER_BATCH_MAX_SIZE`` users in one query."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = UserBatchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        users = annotate_relationships(
+            User.objects.filter(pk__in=ids, is_active=True),
+            request.user
+        ).only(
+            'id', 'username', 'first_name', 'last_name', 'avatar', 'is_verified',
+            'followers_count', 'following_count'
+        )
+        # Keep the caller's ordering; unknown or inactive ids are left out
+        by_id = {user.pk: user for user in users}
+        ordered = [by_id[pk] for pk in ids if pk in by_id]
+        return Response(UserSummarySerializer(ordered, many=True).data)
+
+class UserSearchView(TransactionPolicyMixin, APIView):
+    """Typeahead over username, name and email prefix, ranked by followers."""
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'user_search'
+
+    def get(self, request):
+        serializer = UserSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        users = search_users(
+            serializer.validated_data['q'],
+            request.user,
+            settings.USER_SEARCH_LIMIT
+        )
+        return Response(UserSummarySerializer(users, many=True).data)
 
-class PasswordResetView(APIView):
+class PasswordResetView(TransactionPolicyMixin, APIView):
     permission_classes = [AllowAny]
     serializer_class = PasswordResetSerializer
+    throttle_scope = 'password_reset'
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -78,7 +210,7 @@ class PasswordResetView(APIView):
             status=status.HTTP_200_OK
         )
 
-class EmailVerificationView(APIView):
+class EmailVerificationView(TransactionPolicyMixin, APIView):
     permission_classes = [AllowAny]
     serializer_class = EmailVerificationSerializer
 
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from celery.schedules import crontab
 
 # Load environment variables
 load_dotenv()
@@ -41,11 +42,14 @@ INSTALLED_APPS = [
     'apps.locations.apps.LocationsConfig',
     'apps.social.apps.SocialConfig',
     'apps.storage.apps.StorageConfig',
+    'apps.core.apps.CoreConfig',
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.middleware.StaticFilesMiddleware',
+    'apps.core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,17 +78,65 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
+# Transactions are opened per view, see apps.core.transactions.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-        'ATOMIC_REQUESTS': True,
         'CONN_MAX_AGE': 600,
     }
 }
 
+# Setting POSTGRES_HOST switches to PostgreSQL (provisioned by docker-compose)
+# with connections borrowed from a psycopg 3 pool. Statements that run more
+# than POSTGRES_PREPARE_THRESHOLD times on a connection are prepared server
+# side. Behind PgBouncer in transaction mode (POSTGRES_PGBOUNCER=True),
+# prepared statements and server-side cursors are turned off.
+if os.getenv('POSTGRES_HOST'):
+    POSTGRES_PGBOUNCER = os.getenv('POSTGRES_PGBOUNCER', 'False') == 'True'
+    DATABASES['default'] = {
+        'ENGINE': 'apps.core.db.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'adorable_db'),
+        'USER': os.getenv('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('POSTGRES_HOST'),
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # Connections go back to the pool rather than staying open per thread
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': os.getenv('POSTGRES_HEALTH_CHECKS', 'True') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': POSTGRES_PGBOUNCER,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', '4')),
+                'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', '20')),
+                'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', '10')),
+                'max_idle': 10 * 60,
+                'max_lifetime': 60 * 60,
+            },
+            'server_side_binding': True,
+            'prepare_threshold': (
+                None if POSTGRES_PGBOUNCER
+                else int(os.getenv('POSTGRES_PREPARE_THRESHOLD', '5'))
+            ),
+        },
+    }
+
+# Read replicas: one alias per host in DATABASE_REPLICA_HOSTS, otherwise
+# configured like 'default'. Safe requests read from a random replica unless
+# the client wrote within the last REPLICA_PIN_SECONDS.
+for index, host in enumerate(filter(None, os.getenv('DATABASE_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['apps.core.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 # Cache
 CACHES = {
     'default': {
@@ -103,6 +155,66 @@ CELERY_CACHE_BACKEND = 'default'
 CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-shares': {
+        'task': 'apps.storage.tasks.purge_expired_shares',
+        'schedule': crontab(minute='*/15'),
+    },
+    'migrate-cold-files': {
+        'task': 'apps.storage.tasks.migrate_cold_files',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # Extracts metadata for uploads whose task could not be enqueued
+    'extract-pending-metadata': {
+        'task': 'apps.storage.tasks.extract_pending_metadata',
+        'schedule': crontab(minute='*/10'),
+    },
+    # Picks up retries and anything enqueued while the broker was down
+    'send-outbox-emails': {
+        'task': 'apps.users.tasks.send_outbox_emails',
+        'schedule': crontab(),
+    },
+    'prune-sent-emails': {
+        'task': 'apps.users.tasks.prune_sent_emails',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+
+# Email
+# Emails are written to an outbox table and sent by a Celery worker over one
+# SMTP connection per batch. docker-compose ships Mailpit as the local SMTP
+# stand-in (web UI on port 8025).
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '1025'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Adorable <no-reply@adorable.local>')
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '100'))
+EMAIL_OUTBOX_MAX_BATCHES = int(os.getenv('EMAIL_OUTBOX_MAX_BATCHES', '50'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+EMAIL_OUTBOX_RETRY_BASE = 30
+EMAIL_OUTBOX_RETRY_MAX = 60 * 60
+EMAIL_OUTBOX_LEASE = 5 * 60
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', '14'))
+EMAIL_OUTBOX_PRUNE_BATCH_SIZE = 1000
+PASSWORD_RESET_URL = os.getenv(
+    'PASSWORD_RESET_URL',
+    'http://localhost:3000/reset-password/{uid}/{token}'
+)
+
+# Storage
+SHARE_EXPIRY_SWEEP_BATCH_SIZE = int(os.getenv('SHARE_EXPIRY_SWEEP_BATCH_SIZE', '1000'))
+SHARE_EXPIRY_SWEEP_MAX_BATCHES = int(os.getenv('SHARE_EXPIRY_SWEEP_MAX_BATCHES', '100'))
+STORAGE_COLD_AFTER_DAYS = int(os.getenv('STORAGE_COLD_AFTER_DAYS', '90'))
+STORAGE_TIERING_BATCH_SIZE = int(os.getenv('STORAGE_TIERING_BATCH_SIZE', '500'))
+STORAGE_METADATA_SWEEP_BATCH_SIZE = int(os.getenv('STORAGE_METADATA_SWEEP_BATCH_SIZE', '200'))
+# Newer uploads are left to the task enqueued at upload time
+STORAGE_METADATA_SWEEP_GRACE = 10 * 60
+STORAGE_RESTORE_LOCK_TIMEOUT = 5 * 60
+STORAGE_RESTORE_WAIT_TIMEOUT = 30
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -120,9 +232,67 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# New and upgraded passwords use Argon2; older hashes are re-hashed on login
+PASSWORD_HASHERS = [
+    'apps.users.hashers.TunableArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '2'))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '102400'))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', '8'))
+
+# Login/register hash on a bounded pool; requests beyond the queue get a 503
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', '4'))
+PASSWORD_HASHING_QUEUE_SIZE = int(os.getenv('PASSWORD_HASHING_QUEUE_SIZE', '32'))
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
+# Email sign-in for the API; usernames still work for the admin
+AUTHENTICATION_BACKENDS = [
+    'apps.users.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Authenticated users are cached in-process for a few seconds and in Redis
+# for longer; User saves invalidate both levels.
+AUTH_USER_CACHE_TTL = 5 * 60
+AUTH_USER_CACHE_LOCAL_TTL = 5
+AUTH_USER_CACHE_LOCAL_SIZE = 10000
+
+# Revoked refresh tokens live in Redis until they would have expired anyway
+TOKEN_BLACKLIST_BACKEND = 'apps.users.blacklist.RedisTokenBlacklist'
+TOKEN_BLACKLIST_CACHE = 'default'
+
+# Serialized profiles are cached per user and revalidated against updated_at
+PROFILE_CACHE_TTL = 60 * 60
+
+# Per-user list responses, orphaned by a version bump on every change
+LIST_CACHE_TTL = int(os.getenv('LIST_CACHE_TTL', 300))
+
+# Upper bound on ids accepted by the batch user lookup
+USER_BATCH_MAX_SIZE = 100
+
+# User search/autocomplete
+USER_SEARCH_MIN_LENGTH = 2
+USER_SEARCH_LIMIT = 20
+
+# Throttle buckets live in Redis and are updated by one Lua call per request
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'apps.core.throttling.RedisRateLimiter')
+RATE_LIMIT_CACHE = 'default'
+
+# Request metrics: Prometheus histograms on /metrics (behind METRICS_AUTH_TOKEN,
+# or open only under DEBUG when unset), Server-Timing headers, and a sampled log of
+# requests slower than SLOW_REQUEST_THRESHOLD_MS with their SQL.
+SERVER_TIMING = os.getenv('SERVER_TIMING', str(DEBUG)) == 'True'
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN', '')
+SLOW_REQUEST_THRESHOLD_MS = (
+    int(os.getenv('SLOW_REQUEST_THRESHOLD_MS')) if os.getenv('SLOW_REQUEST_THRESHOLD_MS') else None
+)
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv('SLOW_REQUEST_SAMPLE_RATE', '0.1'))
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -132,12 +302,57 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Storage backends: 'default' holds user media (MEDIA_ROOT or an
+# S3-compatible bucket), 'cold' holds compressed copies of rarely accessed
+# files. docker-compose ships a MinIO service as the local S3 stand-in.
+FILE_SYSTEM_STORAGE = 'django.core.files.storage.FileSystemStorage'
+S3_STORAGE_OPTIONS = {
+    'endpoint_url': os.getenv('AWS_S3_ENDPOINT_URL'),
+    'access_key': os.getenv('AWS_ACCESS_KEY_ID'),
+    'secret_key': os.getenv('AWS_SECRET_ACCESS_KEY'),
+    'region_name': os.getenv('AWS_REGION'),
+    'file_overwrite': False,
+}
+
+MEDIA_STORAGE_BACKEND = os.getenv('MEDIA_STORAGE_BACKEND', FILE_SYSTEM_STORAGE)
+if MEDIA_STORAGE_BACKEND == FILE_SYSTEM_STORAGE:
+    MEDIA_STORAGE_OPTIONS = {}
+else:
+    MEDIA_STORAGE_OPTIONS = {**S3_STORAGE_OPTIONS, 'bucket_name': os.getenv('AWS_BUCKET_NAME')}
+
+COLD_STORAGE_BACKEND = os.getenv('COLD_STORAGE_BACKEND', FILE_SYSTEM_STORAGE)
+if COLD_STORAGE_BACKEND == FILE_SYSTEM_STORAGE:
+    COLD_STORAGE_OPTIONS = {'location': os.getenv('COLD_STORAGE_ROOT', str(BASE_DIR / 'cold_storage'))}
+else:
+    COLD_STORAGE_OPTIONS = {**S3_STORAGE_OPTIONS, 'bucket_name': os.getenv('COLD_STORAGE_BUCKET', 'adorable-cold')}
+
+STORAGES = {
+    'default': {
+        'BACKEND': MEDIA_STORAGE_BACKEND,
+        'OPTIONS': MEDIA_STORAGE_OPTIONS,
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+    'cold': {
+        'BACKEND': COLD_STORAGE_BACKEND,
+        'OPTIONS': COLD_STORAGE_OPTIONS,
+    },
+}
+
+# Presigned direct-to-bucket uploads, available whenever media lives in S3
+DIRECT_UPLOAD_BACKEND = os.getenv(
+    'DIRECT_UPLOAD_BACKEND',
+    '' if MEDIA_STORAGE_BACKEND == FILE_SYSTEM_STORAGE else 'apps.storage.uploads.S3DirectUploadBackend'
+)
+DIRECT_UPLOAD_MAX_SIZE = int(os.getenv('DIRECT_UPLOAD_MAX_SIZE', str(100 * 1024 * 1024)))
+DIRECT_UPLOAD_EXPIRY = 15 * 60
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -147,6 +362,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'apps.users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
@@ -155,8 +371,44 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # orjson for JSON; msgpack when the client sends Accept: application/msgpack
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.renderers.ORJSONRenderer',
+        'apps.core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.core.parsers.ORJSONParser',
+        'apps.core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'apps.core.throttling.AnonRateThrottle',
+        'apps.core.throttling.UserRateThrottle',
+        'apps.core.throttling.ScopedRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '100/day',
+        'user': '1000/day',
+        'login': '10/min',
+        'register': '5/hour',
+        'password_reset': '5/hour',
+        'user_search': '120/min',
+        'uploads': '300/hour',
+    }
+}
+
+# JWT settings
+from datetime import timedelta
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'UPDATE_LAST_LOGIN': True,
 }
 
 # CORS settings
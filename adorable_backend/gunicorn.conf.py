@@ -0,0 +1,29 @@
+"""Gunicorn settings for serving the ASGI application.
+
+    gunicorn config.asgi:application -c gunicorn.conf.py
+
+Uvicorn workers run async views on an event loop and give each sync view
+its own thread, so one worker overlaps many requests that are waiting on
+Redis, object storage or SMTP. Sync and async routes are served side by side.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+# I/O waits no longer hold a worker, so one per core is enough
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Recycle workers now and then to cap slow memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+accesslog = '-'
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges from the shared metrics directory
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
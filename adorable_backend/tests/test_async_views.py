@@ -0,0 +1,103 @@
+import hashlib
+from unittest import mock
+import msgpack
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+from apps.core.fixtures import PNG_1PX
+from apps.core.testing import LocalServicesTestCase
+from apps.storage.models import File
+from apps.storage.uploads import PURPOSE_FILE, build_upload_key, get_direct_upload_backend, sign_upload
+from apps.users.blacklist import get_token_blacklist
+from apps.users.models import User
+from apps.users.tokens import BlacklistRefreshToken
+
+
+class AsyncAPIViewTests(LocalServicesTestCase):
+    """Async endpoints parse, render and throttle like the DRF views around them."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='async', email='async@example.com')
+        self.refresh = BlacklistRefreshToken.for_user(self.user)
+        self.file = File.objects.create(
+            user=self.user, file='user_files/async.png', file_type='image',
+            original_name='async.png', size=len(PNG_1PX), mime_type='image/png',
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}")
+
+    def completed_upload(self):
+        key = build_upload_key(self.user, PURPOSE_FILE, 'async.png')
+        get_direct_upload_backend().put(key, PNG_1PX)
+        return sign_upload({
+            'purpose': PURPOSE_FILE, 'original_name': 'async.png', 'content_type': 'image/png',
+            'size': len(PNG_1PX), 'md5': hashlib.md5(PNG_1PX).hexdigest(), 'file_type': 'image',
+            'title': '', 'description': '', 'tags': [], 'is_public': False,
+            'user': self.user.pk, 'key': key,
+        })
+
+    def test_form_bodies_are_parsed(self):
+        response = self.client.post('/api/users/auth/logout/', {'refresh': str(self.refresh)})
+
+        self.assertEqual(response.status_code, 205)
+        self.assertTrue(get_token_blacklist().contains(self.refresh['jti']))
+
+    def test_msgpack_in_and_out(self):
+        response = self.client.generic(
+            'POST', '/api/storage/uploads/complete/',
+            msgpack.packb({'upload': self.completed_upload()}),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['size'], len(PNG_1PX))
+        self.assertIn('Accept', response['Vary'])
+
+    def test_accept_header_selects_the_renderer(self):
+        download = f"/api/storage/files/{self.file.pk}/download/"
+
+        as_json = self.client.post(download)
+        as_msgpack = self.client.post(download, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(as_json['Content-Type'], 'application/json')
+        self.assertEqual(as_json.json()['download_count'], 1)
+        self.assertEqual(as_msgpack['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(as_msgpack.content)['download_count'], 2)
+
+    def test_unacceptable_media_type_is_refused(self):
+        response = self.client.post(f"/api/storage/files/{self.file.pk}/download/", HTTP_ACCEPT='text/csv')
+
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_malformed_and_unsupported_bodies_are_rejected(self):
+        malformed = self.client.generic(
+            'POST', '/api/storage/uploads/complete/', b'{', content_type='application/json'
+        )
+        unsupported = self.client.generic(
+            'POST', '/api/storage/uploads/complete/', b'upload', content_type='text/plain'
+        )
+
+        self.assertEqual(malformed.status_code, 400)
+        self.assertIn('JSON parse error', malformed.json()['detail'])
+        self.assertEqual(unsupported.status_code, 415)
+
+    def test_missing_token_is_a_401_with_a_challenge(self):
+        self.client.credentials()
+
+        response = self.client.post(f"/api/storage/files/{self.file.pk}/download/")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+    def test_default_user_throttle_applies(self):
+        download = f"/api/storage/files/{self.file.pk}/download/"
+
+        with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, {'user': '2/min'}):
+            statuses = [self.client.post(download).status_code for _ in range(3)]
+            throttled = self.client.post(download)
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(throttled['Retry-After'], '30')
+        self.assertEqual(File.objects.get(pk=self.file.pk).download_count, 2)
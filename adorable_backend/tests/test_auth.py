@@ -0,0 +1,127 @@
+from unittest import mock
+import msgpack
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+from django.test import override_settings
+from rest_framework.test import APIClient
+from apps.core.testing import LocalServicesTestCase
+from apps.users.hashers import HashingPoolFull
+from apps.users.models import User
+
+PASSWORD = 'login-Passw0rd'
+
+
+class TrustedHeaderBackend:
+    """Synchronous backend that signs in whoever the proxy vouches for."""
+
+    def authenticate(self, request, email=None, **kwargs):
+        if request.headers.get('X-Trusted') == email:
+            return User.objects.filter(email=email).first()
+        return None
+
+
+class RefusingBackend:
+
+    def authenticate(self, request, email=None, **kwargs):
+        raise PermissionDenied
+
+
+class LoginTests(LocalServicesTestCase):
+    """Login parses any API body format and goes through AUTHENTICATION_BACKENDS."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='login', email='login@example.com', password=PASSWORD)
+        self.client = APIClient()
+        self.failures = []
+        user_login_failed.connect(self.record_failure)
+        self.addCleanup(user_login_failed.disconnect, self.record_failure)
+
+    def record_failure(self, sender, credentials, **kwargs):
+        self.failures.append(credentials)
+
+    def login(self, password=PASSWORD, **kwargs):
+        kwargs.setdefault('format', 'json')
+        return self.client.post('/api/users/auth/login/', {'email': self.user.email, 'password': password}, **kwargs)
+
+    def test_login_accepts_every_parser(self):
+        as_json = self.login()
+        as_form = self.login(format=None)
+        as_msgpack = self.client.generic(
+            'POST', '/api/users/auth/login/',
+            msgpack.packb({'email': self.user.email, 'password': PASSWORD}),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(as_json.status_code, 200)
+        self.assertEqual(as_json.json()['user']['id'], self.user.pk)
+        self.assertEqual(as_form.status_code, 200)
+        self.assertEqual(as_msgpack.status_code, 200)
+        self.assertIn('refresh', msgpack.unpackb(as_msgpack.content))
+
+    def test_wrong_password_sends_user_login_failed(self):
+        response = self.login(password='wrong')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.failures), 1)
+        self.assertEqual(self.failures[0]['email'], self.user.email)
+        # Passwords are masked as authenticate() masks them
+        self.assertNotEqual(self.failures[0]['password'], 'wrong')
+
+    def test_unknown_email_and_inactive_users_are_refused(self):
+        unknown = self.client.post('/api/users/auth/login/', {
+            'email': 'nobody@example.com', 'password': PASSWORD,
+        }, format='json')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        inactive = self.login()
+
+        self.assertEqual(unknown.status_code, 400)
+        self.assertEqual(inactive.status_code, 400)
+        self.assertEqual(len(self.failures), 2)
+
+    def test_stale_bearer_header_does_not_block_login(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+
+        self.assertEqual(self.login().status_code, 200)
+
+    @override_settings(AUTHENTICATION_BACKENDS=['tests.test_auth.TrustedHeaderBackend'])
+    def test_synchronous_backends_are_consulted(self):
+        self.assertEqual(self.login(password='ignored', HTTP_X_TRUSTED=self.user.email).status_code, 200)
+        self.assertEqual(self.login().status_code, 400)
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        'tests.test_auth.RefusingBackend', 'apps.users.backends.EmailBackend',
+    ])
+    def test_permission_denied_stops_the_backend_chain(self):
+        self.assertEqual(self.login().status_code, 400)
+        self.assertEqual(len(self.failures), 1)
+
+    def test_saturated_hashing_pool_asks_to_retry(self):
+        with mock.patch('apps.users.backends.acheck_password', side_effect=HashingPoolFull):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class RegisterTests(LocalServicesTestCase):
+
+    def test_form_registration_can_then_log_in(self):
+        client = APIClient()
+
+        registered = client.post('/api/users/auth/register/', {
+            'email': 'form@example.com', 'password': PASSWORD, 'confirm_password': PASSWORD,
+        })
+        login = client.post('/api/users/auth/login/', {'email': 'form@example.com', 'password': PASSWORD})
+
+        self.assertEqual(registered.status_code, 201, registered.content)
+        self.assertEqual(login.status_code, 200)
+        self.assertEqual(login.json()['user']['id'], registered.json()['user']['id'])
+
+    def test_invalid_registration_lists_field_errors(self):
+        response = APIClient().post('/api/users/auth/register/', {
+            'email': 'not-an-email', 'password': PASSWORD, 'confirm_password': 'different',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
@@ -0,0 +1,102 @@
+import time
+from unittest import mock
+import fakeredis
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from apps.core.testing import LocalServicesTestCase
+from apps.users.blacklist import InMemoryTokenBlacklist, RedisTokenBlacklist, get_token_blacklist
+from apps.users.models import User
+from apps.users.tokens import BlacklistRefreshToken
+
+
+class RevocationTests(LocalServicesTestCase):
+    """Rotation and logout put the old refresh token's JTI on the blacklist."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='holder', email='holder@example.com')
+        self.refresh = BlacklistRefreshToken.for_user(self.user)
+        self.client = APIClient()
+
+    def rotate(self, refresh):
+        return self.client.post('/api/users/auth/refresh/', {'refresh': str(refresh)}, format='json')
+
+    def test_rotation_blacklists_the_old_jti(self):
+        response = self.rotate(self.refresh)
+
+        self.assertEqual(response.status_code, 200)
+        rotated = BlacklistRefreshToken(response.data['refresh'])
+        self.assertNotEqual(rotated['jti'], self.refresh['jti'])
+        self.assertTrue(get_token_blacklist().contains(self.refresh['jti']))
+        self.assertFalse(get_token_blacklist().contains(rotated['jti']))
+        # The old token is spent; the rotated one keeps working
+        self.assertEqual(self.rotate(self.refresh).status_code, 401)
+        self.assertEqual(self.rotate(rotated).status_code, 200)
+
+    def test_logout_revokes_the_refresh_token(self):
+        access = self.refresh.access_token
+
+        response = self.client.post(
+            '/api/users/auth/logout/', {'refresh': str(self.refresh)}, format='json',
+            HTTP_AUTHORIZATION=f"Bearer {access}",
+        )
+
+        self.assertEqual(response.status_code, 205)
+        self.assertTrue(get_token_blacklist().contains(self.refresh['jti']))
+        self.assertEqual(self.rotate(self.refresh).status_code, 401)
+        with self.assertRaises(TokenError):
+            BlacklistRefreshToken(str(self.refresh))
+
+    def test_entry_expires_with_the_token(self):
+        self.rotate(self.refresh)
+
+        blacklist = get_token_blacklist()
+        self.assertEqual(blacklist._entries[self.refresh['jti']], self.refresh['exp'])
+        with mock.patch('apps.users.blacklist.time.time', return_value=self.refresh['exp'] - 1):
+            self.assertTrue(blacklist.contains(self.refresh['jti']))
+        with mock.patch('apps.users.blacklist.time.time', return_value=self.refresh['exp']):
+            self.assertFalse(blacklist.contains(self.refresh['jti']))
+
+
+class InMemoryTokenBlacklistTests(SimpleTestCase):
+
+    def setUp(self):
+        self.blacklist = InMemoryTokenBlacklist()
+
+    def test_expired_entries_are_dropped_on_the_next_add(self):
+        now = time.time()
+        self.blacklist.add('old', now + 10)
+
+        with mock.patch('apps.users.blacklist.time.time', return_value=now + 20):
+            self.blacklist.add('new', now + 60)
+
+        self.assertEqual(set(self.blacklist._entries), {'new'})
+
+    def test_already_expired_tokens_are_not_stored(self):
+        self.blacklist.add('stale', time.time() - 1)
+
+        self.assertFalse(self.blacklist.contains('stale'))
+        self.assertEqual(self.blacklist._entries, {})
+
+
+class RedisTokenBlacklistTests(SimpleTestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        with mock.patch('django_redis.get_redis_connection', return_value=self.redis):
+            self.blacklist = RedisTokenBlacklist()
+
+    def test_key_ttl_matches_the_token_expiry(self):
+        expires_at = int(time.time()) + 3600
+
+        self.blacklist.add('jti', expires_at)
+
+        self.assertTrue(self.blacklist.contains('jti'))
+        self.assertIn(self.redis.ttl(f"{RedisTokenBlacklist.key_prefix}jti"), (3599, 3600))
+
+    def test_already_expired_tokens_are_not_stored(self):
+        self.blacklist.add('stale', time.time() - 1)
+
+        self.assertFalse(self.blacklist.contains('stale'))
+        self.assertEqual(self.redis.dbsize(), 0)
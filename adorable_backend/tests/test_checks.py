@@ -0,0 +1,15 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+
+class HarnessCommandTests(TransactionTestCase):
+    """Run the in-process harness commands so regressions fail the test suite."""
+    # check_replica_routing adds and migrates its replica alias while running
+    databases = '__all__'
+
+    def test_query_budgets(self):
+        call_command('check_query_budgets', stdout=StringIO(), stderr=StringIO())
+
+    def test_replica_routing(self):
+        call_command('check_replica_routing', stdout=StringIO())
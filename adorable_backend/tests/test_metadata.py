@@ -0,0 +1,248 @@
+import zlib
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from apps.core.testing import LocalServicesTestCase
+from apps.storage import metadata
+from apps.storage.metadata import PdfReader, extract_metadata, pdf_metadata, unpredict
+from apps.storage.models import File
+from apps.users.models import User
+
+XREF_WIDTHS = (1, 4, 2)
+
+
+class PdfBuilder:
+    """Writes minimal PDFs object by object, one xref section per ``finish_*`` call.
+
+    Calling a ``finish_*`` method again appends an incremental update whose
+    section lists only the objects written since, chained through ``/Prev``.
+    """
+
+    def __init__(self, version='1.7'):
+        self.data = bytearray(b'%PDF-' + version.encode() + b'\n%\xe2\xe3\xcf\xd3\n')
+        self.entries = {0: (0, 0, 65535)}
+        self.pending = [0]
+        self.size = 1
+        self.previous = None
+
+    def track(self, number, entry):
+        self.entries[number] = entry
+        self.pending.append(number)
+        self.size = max(self.size, number + 1)
+
+    def add(self, number, body):
+        self.track(number, (1, len(self.data), 0))
+        self.data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+
+    def add_stream(self, number, dictionary, payload):
+        self.track(number, (1, len(self.data), 0))
+        self.data += b'%d 0 obj\n<< %s /Length %d >>\nstream\n%s\nendstream\nendobj\n' % (
+            number, dictionary, len(payload), payload
+        )
+
+    def add_object_stream(self, number, objects):
+        """Store ``{number: body}`` compressed inside object stream ``number``."""
+        header, bodies = [], b''
+        for inner, body in objects.items():
+            header.append(b'%d %d' % (inner, len(bodies)))
+            bodies += body + b'\n'
+        header = b' '.join(header) + b'\n'
+        self.add_stream(
+            number,
+            b'/Type /ObjStm /N %d /First %d /Filter /FlateDecode' % (len(objects), len(header)),
+            zlib.compress(header + bodies),
+        )
+        for index, inner in enumerate(objects):
+            self.track(inner, (2, number, index))
+
+    def add_page_tree(self, pages, first=3, catalog=1, tree=2):
+        """Catalog ``catalog`` pointing at page tree ``tree`` with ``pages`` leaves."""
+        kids = b' '.join(b'%d 0 R' % number for number in range(first, first + pages))
+        self.add(catalog, b'<< /Type /Catalog /Pages %d 0 R >>' % tree)
+        self.add(tree, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, pages))
+        for number in range(first, first + pages):
+            self.add(number, b'<< /Type /Page /Parent %d 0 R >>' % tree)
+
+    def trailer_keys(self, root):
+        keys = b'/Size %d /Root %d 0 R' % (self.size, root)
+        if self.previous is not None:
+            keys += b' /Prev %d' % self.previous
+        return keys
+
+    def finish_table(self, root=1):
+        offset = len(self.data)
+        self.data += b'xref\n'
+        for number in sorted(set(self.pending)):
+            kind, value, generation = self.entries[number]
+            self.data += b'%d 1\n%010d %05d %s \n' % (number, value, generation, b'n' if kind else b'f')
+        self.data += b'trailer\n<< %s >>\n' % self.trailer_keys(root)
+        return self.close_section(offset)
+
+    def finish_stream(self, number, root=1, predictor=True):
+        offset = len(self.data)
+        self.track(number, (1, offset, 0))
+        numbers = sorted(set(self.pending))
+        rows = [
+            b''.join(value.to_bytes(width, 'big') for value, width in zip(self.entries[n], XREF_WIDTHS))
+            for n in numbers
+        ]
+        dictionary = b'/Type /XRef /W [%d %d %d] /Index [%s] %s /Filter /FlateDecode' % (
+            *XREF_WIDTHS, b' '.join(b'%d 1' % n for n in numbers), self.trailer_keys(root)
+        )
+        if predictor:
+            dictionary += b' /DecodeParms << /Predictor 12 /Columns %d >>' % sum(XREF_WIDTHS)
+            rows = self.predict_up(rows)
+        self.add_stream(number, dictionary, zlib.compress(b''.join(rows)))
+        return self.close_section(offset)
+
+    @staticmethod
+    def predict_up(rows):
+        previous = bytes(len(rows[0]))
+        encoded = []
+        for row in rows:
+            encoded.append(b'\x02' + bytes((a - b) & 0xFF for a, b in zip(row, previous)))
+            previous = row
+        return encoded
+
+    def close_section(self, offset):
+        self.data += b'startxref\n%d\n%%%%EOF\n' % offset
+        self.previous = offset
+        self.pending = []
+        return bytes(self.data)
+
+
+def classic_pdf(pages):
+    builder = PdfBuilder()
+    builder.add_page_tree(pages)
+    return builder.finish_table()
+
+
+class PdfReaderTests(SimpleTestCase):
+    """Page counts from every cross-reference layout ``PdfReader`` understands."""
+
+    def pages(self, data):
+        return PdfReader(data).page_count()
+
+    def test_classic_xref_table(self):
+        self.assertEqual(self.pages(classic_pdf(3)), 3)
+
+    def test_xref_stream_with_png_predictor(self):
+        builder = PdfBuilder()
+        builder.add_page_tree(4)
+        data = builder.finish_stream(7)
+
+        self.assertIn(b'/Predictor 12', data)
+        self.assertEqual(self.pages(data), 4)
+
+    def test_xref_stream_without_predictor(self):
+        builder = PdfBuilder()
+        builder.add_page_tree(2)
+
+        self.assertEqual(self.pages(builder.finish_stream(5, predictor=False)), 2)
+
+    def test_page_tree_in_an_object_stream(self):
+        builder = PdfBuilder()
+        builder.add_object_stream(10, {
+            1: b'<< /Type /Catalog /Pages 2 0 R >>',
+            # An unreferenced tree ahead of the real one: offsets must be honoured
+            8: b'<< /Type /Pages /Kids [] /Count 99 >>',
+            2: b'<< /Type /Pages /Kids [3 0 R 4 0 R 5 0 R 6 0 R 7 0 R] /Count 5 >>',
+        })
+        for number in range(3, 8):
+            builder.add(number, b'<< /Type /Page /Parent 2 0 R >>')
+
+        self.assertEqual(self.pages(builder.finish_stream(11)), 5)
+
+    def test_incremental_update_through_prev(self):
+        builder = PdfBuilder()
+        builder.add_page_tree(2)
+        builder.finish_table()
+        # The update rewrites the page tree and adds a page; older objects stay put
+        builder.add(2, b'<< /Type /Pages /Kids [3 0 R 4 0 R 5 0 R] /Count 3 >>')
+        builder.add(5, b'<< /Type /Page /Parent 2 0 R >>')
+        data = builder.finish_table()
+
+        self.assertEqual(data.count(b'startxref'), 2)
+        self.assertEqual(self.pages(data), 3)
+
+    def test_update_reaches_objects_only_the_older_section_lists(self):
+        builder = PdfBuilder()
+        builder.add_page_tree(2)
+        builder.finish_table()
+        # A new catalog in a stream-based update; the page tree is only in the original table
+        builder.add(8, b'<< /Type /Catalog /Pages 2 0 R /Lang (en) >>')
+        data = builder.finish_stream(9, root=8)
+
+        self.assertEqual(self.pages(data), 2)
+
+    def test_newest_definition_wins_across_sections(self):
+        builder = PdfBuilder()
+        builder.add_page_tree(1)
+        builder.finish_stream(6)
+        builder.add(2, b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>')
+        builder.add(4, b'<< /Type /Page /Parent 2 0 R >>')
+
+        self.assertEqual(self.pages(builder.finish_stream(7)), 2)
+
+    def test_prev_cycle_is_followed_once(self):
+        builder = PdfBuilder()
+        builder.add_page_tree(1)
+        data = builder.finish_table()
+        # A section naming itself as its predecessor must not loop
+        data = data.replace(b'trailer\n<< ', b'trailer\n<< /Prev %d ' % builder.previous)
+
+        self.assertEqual(self.pages(data), 1)
+
+    def test_reads_are_capped(self):
+        data = classic_pdf(2)
+        reader = PdfReader(data)
+        reader.remaining = 64
+
+        with self.assertRaises(ValueError):
+            reader.page_count()
+
+    def test_unpredict_rejects_unknown_filters(self):
+        with self.assertRaises(ValueError):
+            unpredict(b'\x04abc', 3)
+
+
+class PdfMetadataTests(SimpleTestCase):
+
+    def test_version_and_pages(self):
+        self.assertEqual(pdf_metadata(classic_pdf(6), complete=True), {'pdf_version': '1.7', 'pages': 6})
+
+    def test_linearized_hint_when_only_the_header_was_read(self):
+        builder = PdfBuilder(version='1.5')
+        builder.add(20, b'<< /Linearized 1 /L 9999 /H [ 0 0 ] /O 3 /E 0 /N 12 /T 0 >>')
+        builder.add_page_tree(12)
+        data = builder.finish_table()
+
+        self.assertEqual(pdf_metadata(data[:metadata.HEADER_SIZE], complete=False), {
+            'pdf_version': '1.5', 'pages': 12,
+        })
+
+    def test_broken_cross_reference_keeps_the_version(self):
+        data = classic_pdf(2).replace(b'startxref', b'startxrf')
+
+        self.assertEqual(pdf_metadata(data, complete=True), {'pdf_version': '1.7'})
+
+
+class ExtractMetadataTests(LocalServicesTestCase):
+    """Stored PDFs are memory-mapped and read through the same cross-reference path."""
+
+    def test_stored_pdf_is_counted_through_mmap(self):
+        user = User.objects.create_user(username='pdf', email='pdf@example.com')
+        builder = PdfBuilder()
+        builder.add_object_stream(10, {
+            1: b'<< /Type /Catalog /Pages 2 0 R >>',
+            2: b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        })
+        builder.add(3, b'<< /Type /Page /Parent 2 0 R >>')
+        data = builder.finish_stream(11)
+        file = File.objects.create(
+            user=user, file=SimpleUploadedFile('doc.pdf', data), file_type='other',
+            original_name='doc.pdf', size=len(data), mime_type='application/octet-stream',
+        )
+
+        self.assertEqual(extract_metadata(file), ('application/pdf', 'document', {
+            'kind': 'document', 'pdf_version': '1.7', 'pages': 1,
+        }))
@@ -0,0 +1,22 @@
+from django.test import SimpleTestCase, override_settings
+
+
+class MetricsViewTests(SimpleTestCase):
+    """/metrics needs the scrape token, or DEBUG when no token is configured."""
+
+    @override_settings(METRICS_AUTH_TOKEN='', DEBUG=False)
+    def test_closed_without_a_token_in_production(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_AUTH_TOKEN='', DEBUG=True)
+    def test_open_without_a_token_under_debug(self):
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-secret', DEBUG=True)
+    def test_token_is_required_once_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
@@ -0,0 +1,176 @@
+import smtplib
+from datetime import timedelta
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.users.models import OutboxEmail
+from apps.users.tasks import claim_outbox_batch, prune_sent_emails, send_outbox_emails
+
+
+class RefusingEmailBackend(locmem.EmailBackend):
+    """Connects, then has every message refused by the server."""
+
+    def send_messages(self, messages):
+        raise smtplib.SMTPDataError(451, b'Try again later')
+
+
+class UnreachableEmailBackend(locmem.EmailBackend):
+
+    def open(self):
+        raise smtplib.SMTPConnectError(421, b'Service not available')
+
+
+def queue(count=1, **fields):
+    return [
+        OutboxEmail.objects.create(
+            to=f"user{index}@example.com", subject='Hello', body='Plain', **fields
+        )
+        for index in range(count)
+    ]
+
+
+class OutboxTestCase(TestCase):
+
+    def assertAbout(self, value, expected):
+        self.assertLess(abs((value - expected).total_seconds()), 5)
+
+
+class SendOutboxTests(OutboxTestCase):
+    """The test runner swaps in the locmem backend, so sent mail lands in ``mail.outbox``."""
+
+    def test_due_emails_are_sent_once(self):
+        email, = queue(html_body='<p>Rich</p>')
+
+        self.assertEqual(send_outbox_emails(), 1)
+        self.assertEqual(send_outbox_emails(), 0)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [email.to])
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Rich</p>', 'text/html')])
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_emails_not_yet_due_are_left_alone(self):
+        queue(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        queue(status=OutboxEmail.STATUS_FAILED)
+
+        self.assertEqual(send_outbox_emails(), 0)
+        self.assertEqual(mail.outbox, [])
+
+    def test_batches_drain_the_backlog(self):
+        queue(5)
+
+        self.assertEqual(send_outbox_emails(batch_size=2), 5)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(EMAIL_BACKEND='tests.test_outbox.RefusingEmailBackend')
+    def test_smtp_failure_counts_an_attempt_and_backs_off(self):
+        email, = queue()
+
+        self.assertEqual(send_outbox_emails(), 0)
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('Try again later', email.last_error)
+        self.assertAbout(email.next_attempt_at, timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_BASE))
+
+        # Due again: the delay doubles with each attempt
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        send_outbox_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 2)
+        self.assertAbout(email.next_attempt_at, timezone.now() + timedelta(seconds=2 * settings.EMAIL_OUTBOX_RETRY_BASE))
+
+    @override_settings(EMAIL_BACKEND='tests.test_outbox.RefusingEmailBackend', EMAIL_OUTBOX_RETRY_BASE=1000)
+    def test_backoff_is_capped(self):
+        # The third attempt would wait 4000 seconds uncapped
+        email, = queue(attempts=2)
+
+        send_outbox_emails()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertAbout(email.next_attempt_at, timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_MAX))
+
+    @override_settings(EMAIL_BACKEND='tests.test_outbox.RefusingEmailBackend')
+    def test_failing_the_last_attempt_gives_up(self):
+        email, = queue(attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS - 1)
+
+        send_outbox_emails()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+        self.assertEqual(email.attempts, settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+
+    @override_settings(EMAIL_BACKEND='tests.test_outbox.UnreachableEmailBackend')
+    def test_connection_failure_backs_off_the_whole_batch(self):
+        emails = queue(3)
+
+        self.assertEqual(send_outbox_emails(), 0)
+
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertIn('Service not available', email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+
+
+class ClaimOutboxTests(OutboxTestCase):
+
+    def test_claim_leases_and_counts_the_attempt(self):
+        email, = queue()
+
+        claimed = claim_outbox_batch(10)
+
+        self.assertEqual(claimed, [email])
+        self.assertEqual(claimed[0].attempts, 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertAbout(email.next_attempt_at, timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE))
+        # A leased email is not handed to another worker until the lease runs out
+        self.assertEqual(claim_outbox_batch(10), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        email, = queue(status=OutboxEmail.STATUS_SENDING, attempts=1)
+
+        claimed = claim_outbox_batch(10)
+
+        self.assertEqual(claimed, [email])
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 2)
+
+    def test_exhausted_lease_is_marked_failed(self):
+        email, = queue(status=OutboxEmail.STATUS_SENDING, attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+
+        self.assertEqual(claim_outbox_batch(10), [])
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+        self.assertEqual(email.last_error, 'Lease expired after the last attempt')
+
+    def test_claims_oldest_first_up_to_the_batch_size(self):
+        now = timezone.now()
+        late, early = queue(next_attempt_at=now - timedelta(minutes=1)) + queue(next_attempt_at=now - timedelta(minutes=2))
+        queue(next_attempt_at=now)
+
+        self.assertEqual(claim_outbox_batch(2), [early, late])
+
+
+class PruneOutboxTests(OutboxTestCase):
+
+    def test_only_old_sent_emails_are_deleted(self):
+        old = timezone.now() - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS + 1)
+        expired = queue(3, status=OutboxEmail.STATUS_SENT, sent_at=old)
+        recent, = queue(status=OutboxEmail.STATUS_SENT, sent_at=timezone.now())
+        failed, = queue(status=OutboxEmail.STATUS_FAILED)
+
+        self.assertEqual(prune_sent_emails(batch_size=2), len(expired))
+
+        self.assertQuerySetEqual(OutboxEmail.objects.order_by('pk'), [recent, failed])
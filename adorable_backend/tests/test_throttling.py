@@ -0,0 +1,115 @@
+import threading
+from types import SimpleNamespace
+from unittest import mock
+import fakeredis
+from django.test import SimpleTestCase
+from apps.core.throttling import InMemoryRateLimiter, RedisRateLimiter
+
+
+class Clock:
+    """Hand-advanced stand-in for the ``time`` module."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def module(self):
+        return SimpleNamespace(time=lambda: self.now, monotonic=lambda: self.now)
+
+
+class RateLimiterContract:
+    """Behaviour every limiter shares; subclasses provide ``limiter`` and ``clock``."""
+
+    def test_allows_a_burst_up_to_the_limit(self):
+        results = [self.limiter.hit('burst', 3, 60) for _ in range(4)]
+
+        self.assertEqual([allowed for allowed, wait in results], [True, True, True, False])
+        self.assertEqual([wait for allowed, wait in results[:3]], [0.0, 0.0, 0.0])
+
+    def test_wait_is_the_time_until_the_next_token(self):
+        for _ in range(2):
+            self.limiter.hit('wait', 2, 60)
+
+        allowed, wait = self.limiter.hit('wait', 2, 60)
+
+        # Two tokens a minute: one every 30 seconds
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30.0, places=3)
+
+        self.clock.advance(12)
+        allowed, wait = self.limiter.hit('wait', 2, 60)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 18.0, places=3)
+
+    def test_refills_continuously(self):
+        for _ in range(2):
+            self.limiter.hit('refill', 2, 60)
+
+        self.clock.advance(30)
+        self.assertEqual(self.limiter.hit('refill', 2, 60), (True, 0.0))
+        self.assertFalse(self.limiter.hit('refill', 2, 60)[0])
+
+        # Idle time never fills the bucket past its capacity
+        self.clock.advance(3600)
+        results = [self.limiter.hit('refill', 2, 60)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    def test_keys_are_independent(self):
+        self.limiter.hit('alice', 1, 60)
+
+        self.assertFalse(self.limiter.hit('alice', 1, 60)[0])
+        self.assertTrue(self.limiter.hit('bob', 1, 60)[0])
+
+
+class RedisRateLimiterTests(RateLimiterContract, SimpleTestCase):
+    """``TOKEN_BUCKET_SCRIPT`` run by fakeredis' Lua interpreter."""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.clock = Clock()
+        # The script reads Redis' clock through TIME; key expiry keeps real time
+        patcher = mock.patch('fakeredis.commands_mixins.server_mixin.time', self.clock.module())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with mock.patch('django_redis.get_redis_connection', return_value=self.redis):
+            self.limiter = RedisRateLimiter()
+
+    def test_bucket_expires_once_it_would_be_full(self):
+        self.limiter.hit('ttl', 10, 60)
+
+        key = f"{RedisRateLimiter.key_prefix}ttl"
+        self.assertEqual(self.redis.hget(key, 'tokens'), b'9')
+        # An idle bucket refills completely in ``duration``; no need to keep it longer
+        self.assertGreater(self.redis.pttl(key), 59_000)
+        self.assertLessEqual(self.redis.pttl(key), 60_000)
+
+
+class InMemoryRateLimiterTests(RateLimiterContract, SimpleTestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('apps.core.throttling.time', self.clock.module())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = InMemoryRateLimiter()
+
+    def test_concurrent_hits_never_overdraw_a_bucket(self):
+        threads, limit = 32, 10
+        barrier = threading.Barrier(threads)
+        results = []
+
+        def hit():
+            barrier.wait()
+            for _ in range(5):
+                results.append(self.limiter.hit('shared', limit, 3600)[0])
+
+        workers = [threading.Thread(target=hit) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(results), threads * 5)
+        self.assertEqual(results.count(True), limit)
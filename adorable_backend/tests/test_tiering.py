@@ -0,0 +1,91 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APIClient
+from apps.core.testing import LocalServicesTestCase
+from apps.storage.models import File
+from apps.storage.tiering import TierLockTimeout, freeze, get_cold_name, get_cold_storage, open_file, tier_lock
+from apps.users.models import User
+from apps.users.tokens import BlacklistRefreshToken
+
+CONTENT = b'tiered content ' * 64
+
+
+class TieringTests(LocalServicesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='tiered', email='tiered@example.com')
+        self.file = File.objects.create(
+            user=self.user, file=SimpleUploadedFile('tiered.txt', CONTENT), file_type='document',
+            original_name='tiered.txt', size=len(CONTENT), mime_type='text/plain',
+        )
+
+    def read(self, file):
+        with open_file(file) as handle:
+            return handle.read()
+
+    def test_freeze_and_open_round_trip(self):
+        self.assertTrue(freeze(self.file))
+        self.assertFalse(self.file.file.storage.exists(self.file.file.name))
+        self.assertTrue(get_cold_storage().exists(get_cold_name(self.file)))
+
+        self.assertEqual(self.read(self.file), CONTENT)
+
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.storage_tier, File.TIER_HOT)
+        self.assertFalse(get_cold_storage().exists(get_cold_name(self.file)))
+
+    def test_open_restores_a_file_frozen_after_it_was_loaded(self):
+        stale = File.objects.get(pk=self.file.pk)
+        freeze(self.file)
+
+        # ``stale`` still says hot; the missing object sends it back through the lock
+        self.assertEqual(stale.storage_tier, File.TIER_HOT)
+        self.assertEqual(self.read(stale), CONTENT)
+        self.assertEqual(File.objects.get(pk=self.file.pk).storage_tier, File.TIER_HOT)
+
+    @override_settings(STORAGE_RESTORE_WAIT_TIMEOUT=0)
+    def test_open_waits_for_a_concurrent_tier_move(self):
+        stale = File.objects.get(pk=self.file.pk)
+        freeze(self.file)
+
+        with tier_lock(self.file.pk), self.assertRaises(TierLockTimeout):
+            open_file(stale)
+
+    def test_freeze_skips_a_locked_file(self):
+        with tier_lock(self.file.pk):
+            self.assertFalse(freeze(self.file))
+
+        self.assertEqual(File.objects.get(pk=self.file.pk).storage_tier, File.TIER_HOT)
+
+
+class DownloadUrlTests(LocalServicesTestCase):
+    """Only hot files expose a storage URL; cold ones need /download/ first."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com')
+        self.file = File.objects.create(
+            user=self.user, file=SimpleUploadedFile('cold.txt', CONTENT), file_type='document',
+            original_name='cold.txt', size=len(CONTENT), mime_type='text/plain',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {BlacklistRefreshToken.for_user(self.user).access_token}")
+
+    def test_cold_files_have_no_download_url_until_downloaded(self):
+        freeze(self.file)
+        detail = f"/api/storage/files/{self.file.pk}/"
+
+        cold = self.client.get(detail)
+        listed = self.client.get('/api/storage/files/')
+        downloaded = self.client.post(f"{detail}download/")
+        hot = self.client.get(detail)
+
+        self.assertEqual(cold.data['storage_tier'], File.TIER_COLD)
+        self.assertIsNone(cold.data['download_url'])
+        self.assertIsNone(listed.data['results'][0]['download_url'])
+        self.assertEqual(downloaded.status_code, 200)
+        self.assertTrue(downloaded.json()['download_url'].endswith(self.file.file.url))
+        self.assertEqual(hot.data['storage_tier'], File.TIER_HOT)
+        self.assertIsNotNone(hot.data['download_url'])
@@ -0,0 +1,107 @@
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.test import APIClient
+from apps.core.fixtures import PNG_1PX, seed_fixtures
+from apps.core.testing import LocalServicesTestCase, assert_transaction_policy
+from apps.locations.models import Location
+from apps.storage.models import File
+from apps.users.models import User
+from apps.users.tokens import BlacklistRefreshToken
+
+LOCATION = {
+    'name': 'Office', 'address': '1 Policy Road', 'latitude': '1.5', 'longitude': '2.5', 'type': 'work',
+}
+
+
+class TransactionPolicyTests(LocalServicesTestCase):
+    """Reads run in autocommit, writes in one transaction, overrides as declared."""
+
+    def setUp(self):
+        super().setUp()
+        self.viewer, self.others = seed_fixtures(2)
+        self.stranger = User.objects.create_user(username='stranger', email='stranger@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def assertPolicy(self, method, path, atomic, **kwargs):
+        with self.subTest(method=method, path=path):
+            response = assert_transaction_policy(self.client, method, path, atomic=atomic, **kwargs)
+            self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+
+    def test_reads_run_in_autocommit(self):
+        location = Location.objects.filter(user=self.viewer).first()
+        file = File.objects.filter(user=self.viewer).first()
+        for path in [
+            '/api/locations/',
+            f"/api/locations/{location.pk}/",
+            '/api/social/follows/',
+            '/api/social/blocks/',
+            '/api/social/reports/',
+            '/api/storage/files/',
+            f"/api/storage/files/{file.pk}/",
+            '/api/storage/shared/',
+            '/api/users/auth/profile/',
+            '/api/users/search/?q=seed',
+            f"/api/users/batch/?ids={self.others[0].pk}",
+        ]:
+            self.assertPolicy('get', path, atomic=False)
+
+    def test_writes_run_in_a_transaction(self):
+        location = Location.objects.filter(user=self.viewer).first()
+        own = File.objects.filter(user=self.viewer).first()
+        upload = SimpleUploadedFile('policy.png', PNG_1PX, content_type='image/png')
+
+        self.assertPolicy('post', '/api/locations/', atomic=True, data=LOCATION, format='json')
+        self.assertPolicy('patch', f"/api/locations/{location.pk}/", atomic=True, data={'name': 'Moved'}, format='json')
+        self.assertPolicy('delete', f"/api/locations/{location.pk}/", atomic=True)
+        self.assertPolicy('post', '/api/social/follows/', atomic=True, data={'followed': self.stranger.pk}, format='json')
+        self.assertPolicy('post', '/api/social/blocks/', atomic=True, data={'blocked': self.stranger.pk}, format='json')
+        self.assertPolicy('post', '/api/social/reports/', atomic=True, data={
+            'reported': self.others[0].pk, 'type': 'spam', 'description': 'Policy check',
+        }, format='json')
+        self.assertPolicy('post', '/api/storage/files/', atomic=True, data={
+            'file': upload, 'file_type': 'image', 'original_name': 'policy.png', 'title': 'Policy',
+        }, format='multipart')
+        self.assertPolicy('post', '/api/storage/shared/', atomic=True, data={
+            'file': own.pk, 'shared_with': self.stranger.pk, 'permission': 'view',
+        }, format='json')
+        self.assertPolicy('patch', '/api/users/auth/profile/', atomic=True, data={'first_name': 'Policy'}, format='json')
+
+    def test_overrides_run_in_autocommit(self):
+        own = File.objects.filter(user=self.viewer).first()
+        refresh = BlacklistRefreshToken.for_user(self.viewer)
+
+        self.assertPolicy('post', '/api/storage/files/archive/', atomic=False, data={'files': [own.pk]}, format='json')
+        self.assertPolicy('post', '/api/storage/shared/bulk/', atomic=False, data={
+            'files': [own.pk], 'shared_with': [self.stranger.pk],
+        }, format='json')
+        # Presigning answers without touching the database whether or not a backend is set up
+        with self.subTest(path='/api/storage/uploads/'):
+            assert_transaction_policy(self.client, 'post', '/api/storage/uploads/', atomic=False, data={
+                'original_name': 'direct.png', 'content_type': 'image/png', 'size': 10,
+                'md5': '0' * 32,
+            }, format='json')
+        self.assertPolicy('post', '/api/users/auth/refresh/', atomic=False, data={'refresh': str(refresh)}, format='json')
+
+    def test_async_views_are_exempt_from_atomic_requests(self):
+        """Async views cannot run inside ATOMIC_REQUESTS; Django raises unless they opt out."""
+        refresh = BlacklistRefreshToken.for_user(self.viewer)
+        bearer = {'HTTP_AUTHORIZATION': f"Bearer {refresh.access_token}"}
+        own = File.objects.filter(user=self.viewer).first()
+        client = APIClient()
+
+        with mock.patch.dict(connections[DEFAULT_DB_ALIAS].settings_dict, {'ATOMIC_REQUESTS': True}):
+            login = client.post('/api/users/auth/login/', {
+                'email': self.viewer.email, 'password': 'seed-password',
+            }, format='json')
+            register = client.post('/api/users/auth/register/', {
+                'email': 'policy@example.com', 'password': 'policy-Passw0rd', 'confirm_password': 'policy-Passw0rd',
+            }, format='json')
+            download = client.post(f"/api/storage/files/{own.pk}/download/", **bearer)
+            logout = client.post('/api/users/auth/logout/', {'refresh': str(refresh)}, format='json', **bearer)
+
+        self.assertEqual(login.status_code, 200)
+        self.assertEqual(register.status_code, 201)
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(logout.status_code, 205)
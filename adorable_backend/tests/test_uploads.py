@@ -0,0 +1,189 @@
+import hashlib
+import boto3
+from django.test import override_settings
+from moto import mock_aws
+from rest_framework.test import APIClient
+from storages.backends.s3 import S3Storage
+from apps.core.fixtures import PNG_1PX
+from apps.core.testing import LocalServicesTestCase
+from apps.social.models import Report
+from apps.storage.models import File
+from apps.storage.uploads import S3DirectUploadBackend, get_direct_upload_backend
+from apps.users.models import User
+from apps.users.tokens import BlacklistRefreshToken
+
+BUCKET = 'direct-uploads'
+
+
+class MotoDirectUploadBackend(S3DirectUploadBackend):
+    """S3 backend on its own bucket, whatever default storage is."""
+
+    def __init__(self):
+        super().__init__(S3Storage(
+            bucket_name=BUCKET, access_key='testing', secret_key='testing',
+            region_name='us-east-1', file_overwrite=False,
+        ))
+
+
+class DirectUploadTests(LocalServicesTestCase):
+    """Presign, upload to the in-memory bucket, then complete."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='uploader', email='uploader@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # The completion view is async and reads the Bearer token itself
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {BlacklistRefreshToken.for_user(self.user).access_token}")
+
+    def presign(self, data=PNG_1PX, **overrides):
+        response = self.client.post('/api/storage/uploads/', {
+            'original_name': 'photo.png', 'content_type': 'image/png', 'size': len(data),
+            'md5': hashlib.md5(data).hexdigest(), 'file_type': 'image', 'title': 'Photo',
+            **overrides,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def upload(self, key, data):
+        """Stand in for the browser POSTing to the presigned target."""
+        get_direct_upload_backend().put(key, data)
+
+    def complete(self, upload):
+        return self.client.post('/api/storage/uploads/complete/', {'upload': upload}, format='json')
+
+    def test_complete_registers_the_file_once(self):
+        presigned = self.presign()
+        self.assertTrue(presigned['key'].startswith(f"user_files/{self.user.pk}/"))
+        self.upload(presigned['key'], PNG_1PX)
+
+        first = self.complete(presigned['upload'])
+        second = self.complete(presigned['upload'])
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.json()['size'], len(PNG_1PX))
+        self.assertEqual(first.json()['title'], 'Photo')
+        # A retried completion returns the row the first one created
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        self.assertEqual(File.objects.filter(user=self.user).count(), 1)
+
+    def test_size_mismatch_deletes_the_object(self):
+        presigned = self.presign()
+        self.upload(presigned['key'], PNG_1PX + b'trailing bytes')
+
+        response = self.complete(presigned['upload'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(get_direct_upload_backend().stat(presigned['key']))
+        self.assertFalse(File.objects.exists())
+
+    def test_checksum_mismatch_deletes_the_object(self):
+        presigned = self.presign()
+        tampered = bytes(reversed(PNG_1PX))
+        self.upload(presigned['key'], tampered)
+
+        response = self.complete(presigned['upload'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(get_direct_upload_backend().stat(presigned['key']))
+        self.assertFalse(File.objects.exists())
+
+    def test_missing_object_is_rejected(self):
+        presigned = self.presign()
+
+        response = self.complete(presigned['upload'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Upload not found'})
+
+    def test_token_of_another_user_is_rejected(self):
+        presigned = self.presign()
+        self.upload(presigned['key'], PNG_1PX)
+        other = User.objects.create_user(username='other', email='other@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {BlacklistRefreshToken.for_user(other).access_token}")
+
+        response = self.complete(presigned['upload'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('upload', response.json())
+        self.assertFalse(File.objects.exists())
+
+    def test_evidence_upload_is_attached_to_a_report(self):
+        reported = User.objects.create_user(username='reported', email='reported@example.com')
+        presigned = self.presign(purpose='evidence')
+        self.assertTrue(presigned['key'].startswith('reports/'))
+        self.upload(presigned['key'], PNG_1PX)
+
+        completed = self.complete(presigned['upload'])
+        self.assertEqual(completed.status_code, 201)
+        # Evidence is not a user file; it only yields a token for the report
+        self.assertFalse(File.objects.exists())
+
+        response = self.client.post('/api/social/reports/', {
+            'reported': reported.pk, 'type': 'abuse', 'description': 'See attached',
+            'evidence_upload': completed.json()['evidence_upload'],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Report.objects.get().evidence.name, presigned['key'])
+
+    def test_evidence_token_of_another_user_is_rejected(self):
+        reported = User.objects.create_user(username='reported', email='reported@example.com')
+        presigned = self.presign(purpose='evidence')
+        self.upload(presigned['key'], PNG_1PX)
+        token = self.complete(presigned['upload']).json()['evidence_upload']
+        self.client.force_authenticate(reported)
+
+        response = self.client.post('/api/social/reports/', {
+            'reported': self.user.pk, 'type': 'abuse', 'description': 'Not mine',
+            'evidence_upload': token,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('evidence_upload', response.data)
+
+
+@mock_aws
+@override_settings(DIRECT_UPLOAD_BACKEND='tests.test_uploads.MotoDirectUploadBackend')
+class S3DirectUploadTests(LocalServicesTestCase):
+    """The S3 backend against a moto bucket."""
+
+    def setUp(self):
+        super().setUp()
+        self.s3 = boto3.client(
+            's3', region_name='us-east-1', aws_access_key_id='testing', aws_secret_access_key='testing'
+        )
+        self.s3.create_bucket(Bucket=BUCKET)
+        self.user = User.objects.create_user(username='uploader', email='uploader@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {BlacklistRefreshToken.for_user(self.user).access_token}")
+
+    def presign(self, data):
+        response = self.client.post('/api/storage/uploads/', {
+            'original_name': 'photo.png', 'content_type': 'image/png', 'size': len(PNG_1PX),
+            'md5': hashlib.md5(PNG_1PX).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        presigned = response.data
+        self.assertEqual(presigned['fields']['key'], presigned['key'])
+        self.s3.put_object(Bucket=BUCKET, Key=presigned['key'], Body=data, ContentType='image/png')
+        return presigned
+
+    def test_complete_reads_size_and_etag_from_the_bucket(self):
+        presigned = self.presign(PNG_1PX)
+
+        response = self.client.post('/api/storage/uploads/complete/', {'upload': presigned['upload']}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(File.objects.get().file.name, presigned['key'])
+
+    def test_mismatch_deletes_the_object_from_the_bucket(self):
+        presigned = self.presign(PNG_1PX + b'trailing bytes')
+
+        response = self.client.post('/api/storage/uploads/complete/', {'upload': presigned['upload']}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        listing = self.s3.list_objects_v2(Bucket=BUCKET)
+        self.assertEqual(listing['KeyCount'], 0)